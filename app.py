@@ -3,10 +3,8 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 import streamlit as st
-from src.agents.query_analysis import classify_query_type
-from src.agents.vector_query import query_chromadb
-from src.agents.graph_query import query_neo4j
-from src.agents.response_synthesis import synthesize_response
+from src.agents.orchestrator import stream_answer
+from src.agents.answer_cache import SemanticAnswerCache
 import time
 from pymongo import MongoClient
 import json
@@ -24,6 +22,8 @@ st.set_page_config(
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 DB_NAME = "name"
 COLLECTION_NAME = "chat_history"
+# History views load only these fields; records also carry answer-cache embeddings
+HISTORY_FIELDS = {"query": 1, "response": 1, "timestamp": 1}
 
 # Initialize MongoDB client and collection
 try:
@@ -35,6 +35,9 @@ except Exception as e:
     st.error(f"MongoDB connection failed: {e}")
     collection = None
 
+# Reuse stored answers for near-identical questions over the same context
+answer_cache = SemanticAnswerCache(collection) if collection is not None else None
+
 # Initialize session state
 if "conversation" not in st.session_state:
     st.session_state.conversation = []
@@ -57,7 +60,7 @@ def export_conversation_data(format_type):
             })
     # database data
     if collection is not None:
-        for entry in collection.find().sort("timestamp", -1):
+        for entry in collection.find({}, HISTORY_FIELDS).sort("timestamp", -1):
             data.append({
                 "query": entry["query"],
                 "response": entry["response"],
@@ -135,7 +138,7 @@ if collection is not None:
         # Separate session and database records
         session_recs = [(q, r, "Session") for q, r in reversed(st.session_state.conversation) if r != "Processing..."]
         db_recs = []
-        for e in collection.find().sort("timestamp", -1).limit(8):
+        for e in collection.find({}, HISTORY_FIELDS).sort("timestamp", -1).limit(8):
             if not any(q == e["query"] for q, _, _ in session_recs):
                 db_recs.append((e["query"], e["response"], e["timestamp"]))
         # Combine with session first (newest on top)
@@ -177,13 +180,9 @@ with col1:
         for i, (q, r) in enumerate(st.session_state.conversation):
             if r == "Processing..." and i == st.session_state.processing_index:
                 st.markdown(f"<div style='padding:1rem;border:1px solid #e2e8f0;border-radius:12px;margin-bottom:0.75rem;'><strong>💭 {q}</strong><div style='font-style:italic;margin-top:0.5rem;'>⏳ Processing your request...</div></div>", unsafe_allow_html=True)
-                pb = st.progress(0)
-                statuses = ["🔍 Analyzing...", "📚 Vector DB...", "🕸️ Graph DB...", "🤖 Synthesizing..."]
-                for pct in range(100):
-                    time.sleep(0.01)
-                    pb.progress(pct + 1)
-                    if pct % 25 == 0:
-                        st.write(statuses[pct // 25])
+                # Filled in by the processing logic below as stages complete and tokens arrive
+                progress_bar = st.progress(0, text="🔍 Analyzing...")
+                answer_area = st.empty()
             else:
                 st.markdown(f"<div style='padding:1rem;border:1px solid #e2e8f0;border-radius:12px;margin-bottom:0.75rem;'><strong>💭 {q}</strong><div style='margin-top:0.5rem;'>🤖 {r}</div></div>", unsafe_allow_html=True)
     else:
@@ -204,12 +203,24 @@ if st.session_state.conversation and st.session_state.processing_index >= 0:
     last_q, _ = st.session_state.conversation[st.session_state.processing_index]
     if st.session_state.conversation[st.session_state.processing_index][1] == "Processing...":
         try:
-            classify = classify_query_type(last_q)
-            vec_results = query_chromadb(last_q)[:3]
-            graph_results = query_neo4j(last_q)[:5]
-            resp = synthesize_response(last_q, vec_results, graph_results)
+            stages = {
+                "retrieving": (10, "📚 Searching vector & graph stores..."),
+                "synthesizing": (60, "🤖 Synthesizing..."),
+                "cached": (90, "⚡ Reusing a previous answer..."),
+            }
+            resp, cache_fields = "", {}
+            for kind, value in stream_answer(last_q, answer_cache):
+                if kind == "stage":
+                    progress_bar.progress(*stages[value])
+                elif kind == "token":
+                    resp += value
+                    answer_area.markdown(f"🤖 {resp}▌")
+                elif kind == "cache":
+                    cache_fields = value
+            progress_bar.progress(100, text="✅ Done")
+            resp = resp.strip()
             if collection is not None:
-                collection.insert_one({"query": last_q, "response": resp, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+                collection.insert_one({"query": last_q, "response": resp, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **cache_fields})
         except Exception as e:
             resp = f"❌ Error: {e}"
             if collection is not None:
@@ -26,10 +26,19 @@ class Settings:
     NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+    # Driver pool and retry settings (timeouts/lifetimes in seconds)
+    NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+    NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+    NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+    NEO4J_MAX_RETRY_TIME = float(os.getenv("NEO4J_MAX_RETRY_TIME", "15"))
     
     # ChromaDB Vector Database settings
     CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
     VECTOR_COLLECTION_NAME = os.getenv("VECTOR_COLLECTION_NAME", "corporate_documents")
+    # BM25 lexical index, kept next to the Chroma data
+    SPARSE_INDEX_DIR = os.getenv("SPARSE_INDEX_DIR", os.path.join(CHROMA_PERSIST_DIRECTORY, "sparse_index"))
+    # int8-quantized dense index, memory-mapped for dense search instead of Chroma's HNSW index
+    COMPACT_INDEX_DIR = os.getenv("COMPACT_INDEX_DIR", os.path.join(CHROMA_PERSIST_DIRECTORY, "compact_index"))
     
     # ===== File Path Configuration =====
     # Base project directory
@@ -40,6 +49,20 @@ class Settings:
     RAW_DATA_DIR = DATA_DIR / "raw"
     PROCESSED_DATA_DIR = DATA_DIR / "processed"
     
+    # Record of ingested files (hash, mtime, chunk IDs, triplet counts)
+    INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", str(PROCESSED_DATA_DIR / "ingest_manifest.json"))
+    
+    # Chunk deduplication state (exact hashes and MinHash signatures of stored chunks)
+    DEDUP_STATE_PATH = os.getenv("DEDUP_STATE_PATH", str(PROCESSED_DATA_DIR / "chunk_fingerprints.json"))
+    
+    # Persistent embedding cache keyed by model name and text hash (embeddings per shard file)
+    EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", str(PROCESSED_DATA_DIR / "embedding_cache"))
+    EMBEDDING_CACHE_SHARD_ROWS = int(os.getenv("EMBEDDING_CACHE_SHARD_ROWS", "4096"))
+    
+    # Snapshot of canonical entity names and aliases
+    ENTITY_SNAPSHOT_PATH = os.getenv("ENTITY_SNAPSHOT_PATH", str(PROCESSED_DATA_DIR / "entity_index.json"))
+    
     # Logging directory
     LOG_DIR = BASE_DIR / "logs"
     
@@ -48,20 +71,99 @@ class Settings:
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
     
+    # "sentences" packs whole sentences up to a token budget; "characters" uses fixed character windows
+    CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sentences")
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "250"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    
+    # Skip chunks duplicating stored ones; near duplicates have at least this estimated Jaccard similarity
+    DEDUP_CHUNKS = os.getenv("DEDUP_CHUNKS", "true").lower() == "true"
+    DEDUP_JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.8"))
+    
+    # Chunks embedded and upserted per ChromaDB call
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    
     # Entity extraction parameters
     MAX_ENTITIES_PER_CHUNK = int(os.getenv("MAX_ENTITIES_PER_CHUNK", "20"))
     MIN_ENTITY_CONFIDENCE = float(os.getenv("MIN_ENTITY_CONFIDENCE", "0.7"))
     
+    # NER windowing parameters (tokens per window, overlap, windows per batch)
+    NER_WINDOW_TOKENS = int(os.getenv("NER_WINDOW_TOKENS", "400"))
+    NER_WINDOW_STRIDE = int(os.getenv("NER_WINDOW_STRIDE", "64"))
+    NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "16"))
+    
+    # Graph write parameters (triplets per UNWIND transaction)
+    GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE", "5000"))
+    
+    # Ingestion pipeline parallelism (extraction/NER processes, consumer threads, queue depth)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "1"))
+    INGEST_GRAPH_WORKERS = int(os.getenv("INGEST_GRAPH_WORKERS", "1"))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+    
     # Query processing parameters
     MAX_SEARCH_RESULTS = int(os.getenv("MAX_SEARCH_RESULTS", "10"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
     
+    # Semantic answer cache (seconds an answer stays reusable, history records compared per lookup)
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+    ANSWER_CACHE_MAX_CANDIDATES = int(os.getenv("ANSWER_CACHE_MAX_CANDIDATES", "200"))
+    
+    # Prompt context budget (approximate tokens) and minimum shared text treated as chunk overlap
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_MIN_OVERLAP = int(os.getenv("CONTEXT_MIN_OVERLAP", "40"))
+    
+    # Query embedding/result cache (entries per cache, seconds before expiry)
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "3600"))
+    
+    # Hybrid dense + BM25 retrieval fused by reciprocal rank (RRF_K dampens rank differences)
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "4"))
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    # Re-score fused candidates by embedding cosine similarity
+    HYBRID_RERANK = os.getenv("HYBRID_RERANK", "false").lower() == "true"
+    
+    # Serve dense search from the compact int8 index (candidates re-scored in float32, rows scanned per block)
+    COMPACT_VECTOR_STORE = os.getenv("COMPACT_VECTOR_STORE", "false").lower() == "true"
+    COMPACT_RESCORE_FACTOR = int(os.getenv("COMPACT_RESCORE_FACTOR", "8"))
+    COMPACT_BLOCK_ROWS = int(os.getenv("COMPACT_BLOCK_ROWS", "16384"))
+    
+    # Concurrent retrieval (thread pool size, per-backend timeouts in seconds)
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+    VECTOR_TIMEOUT = float(os.getenv("VECTOR_TIMEOUT", "10"))
+    GRAPH_TIMEOUT = float(os.getenv("GRAPH_TIMEOUT", "10"))
+    
+    # Query routing: "routed" follows classify_query_type, "hybrid" always queries both backends
+    ROUTING_MODE = os.getenv("ROUTING_MODE", "routed")
+    VECTOR_TOP_K = int(os.getenv("VECTOR_TOP_K", "3"))
+    GRAPH_LIMIT = int(os.getenv("GRAPH_LIMIT", "5"))
+    
+    # Entity-aware graph retrieval (hops, edges kept per node per hop, name index refresh seconds)
+    GRAPH_HOPS = int(os.getenv("GRAPH_HOPS", "2"))
+    GRAPH_HOP_FANOUT = int(os.getenv("GRAPH_HOP_FANOUT", "25"))
+    ENTITY_INDEX_TTL = int(os.getenv("ENTITY_INDEX_TTL", "600"))
+    # Top-k multiplier when only one backend is queried
+    SINGLE_BACKEND_TOP_K_FACTOR = int(os.getenv("SINGLE_BACKEND_TOP_K_FACTOR", "2"))
+    # A routed query is escalated to hybrid when its backend is not confident (graph: no explicit
+    # relation rule matched) or returns fewer results than this
+    ESCALATION_MIN_RESULTS = int(os.getenv("ESCALATION_MIN_RESULTS", "1"))
+    
     # ===== Model Configuration =====
     # Embedding model for vector search
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
     
-    # LLM model for entity extraction and query processing
-    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+    # Named entity recognition model for ingestion and query analysis
+    NER_MODEL = os.getenv("NER_MODEL", "dslim/bert-base-NER")
+    
+    # LLM used for response synthesis: a gemini-* model, or "local" for the offline stand-in
+    LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+    
+    # LLM request timeout (seconds) and maximum concurrent requests per process
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    # Per-token delay of the local stand-in, to simulate generation latency in benchmarks
+    LOCAL_LLM_TOKEN_DELAY = float(os.getenv("LOCAL_LLM_TOKEN_DELAY", "0"))
     
     # Temperature for LLM operations (lower = more deterministic)
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.1"))
@@ -0,0 +1,70 @@
+# src/agents/answer_cache.py
+"""
+Semantic answer cache over the MongoDB chat history.
+
+A prior answer is reused when its question embedding is within
+settings.SIMILARITY_THRESHOLD cosine similarity of the new question, it was
+produced from the same retrieved context, the corpus has not been
+re-ingested since, and it is younger than settings.ANSWER_CACHE_TTL.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+import numpy as np
+from src.agents.vector_query import embed_query
+from src.storage.vector_store import collection_version
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+def context_fingerprint(vector_result: list, graph_result: list) -> str:
+    """Hash of the retrieved context an answer was synthesized from."""
+    digest = hashlib.sha256()
+    for part in (vector_result or [], graph_result or []):
+        digest.update("\n".join(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def is_cacheable(response: str) -> bool:
+    return bool(response) and not response.startswith(("[Error", "❌"))
+
+class SemanticAnswerCache:
+    def __init__(self, history_collection, threshold=None, ttl=None):
+        self.history = history_collection
+        self.threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.ttl = settings.ANSWER_CACHE_TTL if ttl is None else ttl
+        try:
+            self.history.create_index([("context_fingerprint", 1), ("corpus_version", 1)])
+        except Exception as e:
+            logger.warning(f"Could not create answer cache index: {e}")
+
+    def lookup(self, query: str, fingerprint: str):
+        """Stored answer for a similar question over the same context, or None."""
+        candidates = list(self.history.find(
+            {
+                "context_fingerprint": fingerprint,
+                "corpus_version": collection_version(),
+                "cached_at": {"$gte": datetime.now() - timedelta(seconds=self.ttl)},
+            },
+            {"embedding": 1, "response": 1},
+        ).sort("cached_at", -1).limit(settings.ANSWER_CACHE_MAX_CANDIDATES))
+        if not candidates:
+            return None
+        query_vec = np.asarray(embed_query(query), dtype=np.float32)
+        matrix = np.asarray([c["embedding"] for c in candidates], dtype=np.float32)
+        scores = matrix @ query_vec / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec) + 1e-12)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        logger.info(f"Semantic answer cache hit (similarity {scores[best]:.3f}).")
+        return candidates[best]["response"]
+
+    def fields(self, query: str, fingerprint: str) -> dict:
+        """Extra fields to store on the chat history record so it can serve later lookups."""
+        return {
+            "embedding": [float(x) for x in embed_query(query)],
+            "context_fingerprint": fingerprint,
+            "corpus_version": collection_version(),
+            "cached_at": datetime.now(),
+        }
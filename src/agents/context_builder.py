@@ -0,0 +1,97 @@
+# src/agents/context_builder.py
+"""
+Prompt context compaction: removes text shared by overlapping chunks,
+collapses repeated graph facts and packs the rest into a token budget.
+"""
+
+import re
+from src.utils.entity_resolver import entity_key
+from config.settings import settings
+
+FACT_PATTERN = re.compile(r"^\((.*) --(.*)--> (.*)\)$")
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+def trim_overlap(kept: str, chunk: str, min_overlap: int) -> str:
+    """Strip from chunk any prefix or suffix it shares with kept (adjacent chunk overlap)."""
+    probe = chunk[:min_overlap]
+    position = kept.find(probe) if len(probe) == min_overlap else -1
+    while position != -1:
+        if chunk.startswith(kept[position:]):
+            return chunk[len(kept) - position:]
+        position = kept.find(probe, position + 1)
+    probe = kept[:min_overlap]
+    position = chunk.find(probe) if len(probe) == min_overlap else -1
+    while position != -1:
+        if kept.startswith(chunk[position:]):
+            return chunk[:position]
+        position = chunk.find(probe, position + 1)
+    return chunk
+
+def dedupe_chunks(chunks: list, min_overlap: int = None) -> list:
+    """Drop chunks contained in earlier ones and trim text overlapping earlier chunks."""
+    min_overlap = min_overlap or settings.CONTEXT_MIN_OVERLAP
+    kept = []
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if any(chunk in k for k in kept):
+            continue
+        for k in kept:
+            chunk = trim_overlap(k, chunk, min_overlap).strip()
+        if chunk:
+            kept.append(chunk)
+    return kept
+
+def dedupe_facts(facts: list) -> list:
+    """Collapse facts that differ only in entity spelling, case or predicate case."""
+    seen, kept = set(), []
+    for fact in facts:
+        match = FACT_PATTERN.match(fact.strip())
+        key = (
+            (entity_key(match.group(1)), match.group(2).strip().lower(), entity_key(match.group(3)))
+            if match else fact.strip().lower()
+        )
+        if key not in seen:
+            seen.add(key)
+            kept.append(fact)
+    return kept
+
+def build_context(vector_result: list, graph_result: list, token_budget: int = None):
+    """
+    Deduplicate and pack retrieved context into a token budget.
+
+    Items are scored by reciprocal retrieval rank within their backend
+    (chunks win ties) and added best-first until the budget is spent.
+
+    Returns:
+        tuple: (vector items, graph items, stats dict)
+    """
+    token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+    chunks = dedupe_chunks(vector_result or [])
+    facts = dedupe_facts(graph_result or [])
+
+    candidates = [(1 / (rank + 1), 0, rank, "vector", c) for rank, c in enumerate(chunks)]
+    candidates += [(1 / (rank + 1), 1, rank, "graph", f) for rank, f in enumerate(facts)]
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+
+    selected = {"vector": [], "graph": []}
+    used = 0
+    for _, _, rank, kind, text in candidates:
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            continue
+        selected[kind].append((rank, text))
+        used += cost
+
+    stats = {
+        "input_tokens": sum(estimate_tokens(t) for t in (vector_result or []) + (graph_result or [])),
+        "context_tokens": used,
+        "dropped_items": len(candidates) - len(selected["vector"]) - len(selected["graph"]),
+    }
+    return (
+        [t for _, t in sorted(selected["vector"])],
+        [t for _, t in sorted(selected["graph"])],
+        stats,
+    )
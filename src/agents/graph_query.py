@@ -1,37 +1,88 @@
-from neo4j import GraphDatabase
+import re
 from src.utils.logger import get_logger
 from config.settings import settings
-from src.storage.graph_store import query_triplets
+from src.storage.graph_store import query_triplets, ensure_schema
+from src.agents.graph_retriever import retrieve_entity_facts
+from src.agents.query_analysis import matching_sources
 
 logger = get_logger(__name__)
 
-def query_neo4j(user_query: str) -> list:
-    """Determine Cypher query based on rule and run it on Neo4j."""
+# Fixed, parameterized templates: the server plans each one once and reuses the cached plan.
+# Lookups go through the full-text indexes created by graph_store.ensure_schema;
+# $sources (null when unscoped) keeps only edges extracted from those documents.
+RELATION_TYPE_QUERY = """
+CALL db.index.fulltext.queryRelationships('relation_type_fulltext', $types) YIELD relationship AS r, score
+MATCH (s:Entity)-[r]->(o:Entity)
+WHERE ($object_term IS NULL OR o.name CONTAINS $object_term)
+  AND ($sources IS NULL OR any(source IN r.sources WHERE source IN $sources))
+RETURN s.name AS subject, r.type AS predicate, o.name AS object
+ORDER BY score DESC
+SKIP $skip LIMIT $limit
+"""
+
+ENTITY_NAME_QUERY = """
+CALL db.index.fulltext.queryNodes('entity_name_fulltext', $terms) YIELD node AS e, score
+MATCH (e)-[r:RELATION]-(:Entity)
+WHERE $sources IS NULL OR any(source IN r.sources WHERE source IN $sources)
+RETURN startNode(r).name AS subject, r.type AS predicate, endNode(r).name AS object
+ORDER BY score DESC
+SKIP $skip LIMIT $limit
+"""
+
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+STOP_WORDS = {
+    "the", "and", "for", "are", "was", "what", "which", "who", "whom", "how",
+    "does", "did", "with", "from", "that", "this", "about", "their", "its", "of",
+}
+
+def lucene_terms(text: str) -> str:
+    """Escape the content words of text into an OR-ed Lucene query (empty if none remain)."""
+    words = [w for w in re.findall(r"\w+", text.lower()) if len(w) > 2 and w not in STOP_WORDS]
+    return " OR ".join(LUCENE_SPECIAL.sub(r"\\\1", w) for w in words)
+
+def build_query(user_query: str):
+    """Pick a template and its parameters based on rules over the user query."""
     user_query_lower = user_query.lower()
 
     if "filed the report" in user_query_lower:
-        cypher_query = """
-        MATCH (s:Entity)-[r:RELATION]->(o:Entity)
-        WHERE r.type CONTAINS 'file' AND o.name CONTAINS 'report'
-        RETURN s.name AS subject, r.type AS predicate, o.name AS object
-        """
+        return RELATION_TYPE_QUERY, {"types": "file*", "object_term": "report"}
     elif "sell" in user_query_lower or "sells" in user_query_lower or "products" in user_query_lower:
-        cypher_query = """
-        MATCH (s:Entity)-[r:RELATION]->(o:Entity)
-        WHERE r.type CONTAINS 'sell' OR r.type CONTAINS 'product'
-        RETURN s.name AS subject, r.type AS predicate, o.name AS object
-        """
-    else:
-        cypher_query = """
-        MATCH (s:Entity)-[r:RELATION]->(o:Entity)
-        WHERE s.name CONTAINS $term OR o.name CONTAINS $term
-        RETURN s.name AS subject, r.type AS predicate, o.name AS object
-        """
+        return RELATION_TYPE_QUERY, {"types": "sell* OR product*", "object_term": None}
+    terms = lucene_terms(user_query)
+    return (ENTITY_NAME_QUERY, {"terms": terms}) if terms else (None, None)
+
+def search_graph(user_query: str, limit: int = None, skip: int = 0, filters: dict = None) -> tuple:
+    """
+    Determine Cypher template based on rule and run it on Neo4j, one page of results at a time.
+    Questions that match no rule first try entity-aware neighborhood retrieval.
+    Metadata filters restrict both to edges from the matching documents.
+
+    Returns:
+        tuple: (fact strings, confident) where confident means an explicit relation
+        rule matched and returned facts. Entity neighborhoods are co-occurrence
+        edges, so a resolved entity alone does not show the graph can answer.
+    """
+    cypher_query, params = build_query(user_query)
+    sources = matching_sources(filters)
+    sources = sorted(sources) if sources is not None else None
 
     try:
-        results = query_triplets(cypher_query.replace("$term", user_query_lower))
+        ensure_schema()
+        if cypher_query is not RELATION_TYPE_QUERY and skip == 0:
+            facts = retrieve_entity_facts(user_query, limit=limit, sources=sources)
+            if facts:
+                logger.info(f"Entity-aware graph retrieval returned {len(facts)} facts.")
+                return facts, False
+        if cypher_query is None:
+            return [], False
+        results = query_triplets(cypher_query, skip=skip, limit=limit or settings.GRAPH_LIMIT, sources=sources, **params)
         logger.info(f"Graph query returned {len(results)} results.")
-        return [f"({r['subject']} --{r['predicate']}--> {r['object']})" for r in results]
+        facts = [f"({r['subject']} --{r['predicate']}--> {r['object']})" for r in results]
+        return facts, cypher_query is RELATION_TYPE_QUERY and bool(facts)
     except Exception as e:
         logger.error(f"Failed to execute Cypher query: {str(e)}")
-        return ["[ERROR] Cypher execution failed."]
\ No newline at end of file
+        return ["[ERROR] Cypher execution failed."], False
+
+def query_neo4j(user_query: str, limit: int = None, skip: int = 0, filters: dict = None) -> list:
+    """Facts for user_query; see search_graph."""
+    return search_graph(user_query, limit=limit, skip=skip, filters=filters)[0]
@@ -0,0 +1,143 @@
+# src/agents/graph_retriever.py
+"""
+Entity-aware graph retrieval: NER on the question, mention resolution
+through an in-memory entity name index, and bounded k-hop expansion.
+"""
+
+import re
+import threading
+import time
+from src.storage.graph_store import read
+from src.utils.model_registry import get_ner_pipeline
+from src.utils.entity_resolver import entity_key, get_resolver
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+ENTITY_NAMES_QUERY = "MATCH (e:Entity) RETURN e.name AS name"
+
+# One hop from the frontier, keeping the heaviest edges per frontier node; degree is
+# counted only for the kept neighbors, so hub entities do not make a hop unbounded
+NEIGHBORHOOD_QUERY = """
+MATCH (e:Entity)-[r:RELATION]-(n:Entity)
+WHERE e.name IN $frontier
+  AND ($sources IS NULL OR any(source IN r.sources WHERE source IN $sources))
+WITH e, r, n
+ORDER BY coalesce(r.weight, 1) DESC
+WITH e, collect({relation: r, neighbor: n})[..$fanout] AS edges
+UNWIND edges AS edge
+WITH edge.relation AS r, edge.neighbor AS n
+RETURN startNode(r).name AS subject, r.type AS predicate, endNode(r).name AS object,
+       coalesce(r.weight, 1) AS weight, COUNT { (n)--() } AS degree, n.name AS neighbor
+"""
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+class EntityNameIndex:
+    """
+    Entity names by normalized key and by word, loaded from Neo4j. Only the
+    first load blocks; once the TTL expires a background thread rebuilds the
+    index while queries keep using the previous one.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.ENTITY_INDEX_TTL if ttl is None else ttl
+        self.index = ({}, {})
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        names, words = {}, {}
+        for record in read(ENTITY_NAMES_QUERY):
+            name = record["name"]
+            names.setdefault(entity_key(name), set()).add(name)
+            for word in _words(name):
+                words.setdefault(word, set()).add(name)
+        self.index, self.loaded_at = (names, words), time.monotonic()
+        logger.info(f"Loaded {len(names)} entity names into the name index.")
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Entity name index refresh failed, keeping the previous index: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_loaded(self):
+        if self.loaded_at is None:
+            with self._lock:
+                if self.loaded_at is None:
+                    self.refresh()
+            return
+        if time.monotonic() - self.loaded_at <= self.ttl:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def resolve(self, mention):
+        """Entity names matching mention's normalized key or alias, else names containing all its words."""
+        self._ensure_loaded()
+        names, words = self.index
+        canonical = get_resolver().lookup(mention)
+        exact = names.get(entity_key(canonical or mention))
+        if exact:
+            return set(exact)
+        candidates = [words.get(word, set()) for word in _words(mention)]
+        return set.intersection(*candidates) if candidates else set()
+
+name_index = EntityNameIndex()
+
+def extract_mentions(question):
+    """Entity mentions found in the question by the shared NER model, read from their spans."""
+    mentions = (question[ent["start"]:ent["end"]].strip() for ent in get_ner_pipeline()(question))
+    return [mention for mention in mentions if mention]
+
+def expand_neighborhood(seeds, hops=None, fanout=None, limit=None, sources=None):
+    """
+    Collect facts around seed entities, one hop at a time, following only
+    edges extracted from the given source documents when sources is set.
+
+    Each hop keeps only the heaviest fanout edges per frontier node and stops
+    early once limit facts have been gathered. Facts are ranked by hop
+    distance, then edge weight, then neighbor degree.
+
+    Returns:
+        list: "(subject --predicate--> object)" strings, at most limit of them.
+    """
+    hops = hops or settings.GRAPH_HOPS
+    fanout = fanout or settings.GRAPH_HOP_FANOUT
+    limit = limit or settings.GRAPH_LIMIT
+    facts, seen = {}, set(seeds)
+    frontier = list(seeds)
+    for hop in range(hops):
+        if not frontier or len(facts) >= limit:
+            break
+        next_frontier = []
+        for record in read(NEIGHBORHOOD_QUERY, frontier=frontier, fanout=fanout, sources=sources):
+            key = (record["subject"], record["predicate"], record["object"])
+            if key not in facts:
+                facts[key] = (hop, -record["weight"], -record["degree"])
+            if record["neighbor"] not in seen:
+                seen.add(record["neighbor"])
+                next_frontier.append(record["neighbor"])
+        frontier = next_frontier[:fanout]
+    ranked = sorted(facts, key=facts.get)[:limit]
+    return [f"({s} --{p}--> {o})" for s, p, o in ranked]
+
+def retrieve_entity_facts(question, limit=None, sources=None):
+    """Facts from the neighborhoods of the entities mentioned in question (empty if none resolve)."""
+    seeds = set()
+    for mention in extract_mentions(question):
+        seeds |= name_index.resolve(mention)
+    if not seeds:
+        return []
+    logger.info(f"Resolved question entities to {len(seeds)} graph nodes.")
+    return expand_neighborhood(sorted(seeds), limit=limit, sources=sources)
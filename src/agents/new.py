@@ -1,6 +1,5 @@
 import chromadb
-from sentence_transformers import SentenceTransformer
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from src.utils.model_registry import get_embedding_function
 
 from config.settings import settings
 
@@ -8,7 +7,7 @@ from config.settings import settings
 chroma_client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIRECTORY)
 
 # Define embedding function
-embedding_function = SentenceTransformerEmbeddingFunction(model_name=settings.EMBEDDING_MODEL)
+embedding_function = get_embedding_function()
 
 # Get or create collection
 collection = chroma_client.get_or_create_collection(
@@ -0,0 +1,214 @@
+# src/agents/orchestrator.py
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from src.agents.query_analysis import classify_query_type, extract_filters
+from src.agents.vector_query import query_chromadb
+from src.agents.graph_query import search_graph
+from src.agents.response_synthesis import synthesize_response, stream_response, build_prompt
+from src.agents.context_builder import build_context, estimate_tokens
+from src.agents.answer_cache import context_fingerprint, is_cacheable
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+# Shared across Streamlit reruns; a timed-out retrieval keeps its thread until it returns
+executor = ThreadPoolExecutor(max_workers=settings.RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+# Backends queried first for each query type
+PLANS = {
+    "graph": ("graph",),
+    "vector": ("vector",),
+    "hybrid": ("vector", "graph"),
+}
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+# Backends return (results, confident); an unconfident routed result is escalated to hybrid
+def _vector(query, limit, filters):
+    results = query_chromadb(query, top_k=limit, filters=filters)
+    return results, len(results) >= settings.ESCALATION_MIN_RESULTS
+
+def _graph(query, limit, filters):
+    facts, confident = search_graph(query, limit=limit, filters=filters)
+    # search_graph reports failures as "[ERROR] ..." strings; treat them as no results
+    facts = [r for r in facts if not r.startswith("[ERROR]")]
+    return facts, confident and len(facts) >= settings.ESCALATION_MIN_RESULTS
+
+BACKENDS = {
+    "vector": (_vector, lambda: settings.VECTOR_TIMEOUT),
+    "graph": (_graph, lambda: settings.GRAPH_TIMEOUT),
+}
+
+def plan_retrieval(query_type: str) -> tuple:
+    """Backends to query first; ROUTING_MODE=hybrid disables routing and always fans out to both."""
+    if settings.ROUTING_MODE == "hybrid":
+        return PLANS["hybrid"]
+    return PLANS.get(query_type, PLANS["hybrid"])
+
+def result_limits(backends: tuple) -> dict:
+    """Adaptive top-k: a backend queried on its own gets a larger share of the context."""
+    factor = settings.SINGLE_BACKEND_TOP_K_FACTOR if len(backends) == 1 else 1
+    return {"vector": settings.VECTOR_TOP_K * factor, "graph": settings.GRAPH_LIMIT * factor}
+
+def _run_backends(
+    query: str, backends: tuple, limits: dict, results: dict, timings: dict, filters: dict = None, confident: dict = None
+):
+    """Run backends concurrently, each under its own timeout, filling results, timings and confidence."""
+    confident = {} if confident is None else confident
+    start = time.perf_counter()
+    futures = {
+        name: executor.submit(_timed, BACKENDS[name][0], query, limits[name], filters)
+        for name in backends
+    }
+    for name, future in futures.items():
+        timeout = BACKENDS[name][1]()
+        remaining = max(timeout - (time.perf_counter() - start), 0)
+        try:
+            (results[name], confident[name]), timings[f"{name}_ms"] = future.result(timeout=remaining)
+        except FutureTimeout:
+            logger.warning(f"{name} retrieval timed out after {timeout}s; continuing without it.")
+            results[name], confident[name], timings[f"{name}_ms"] = [], False, None
+        except Exception as e:
+            logger.error(f"{name} retrieval failed: {e}")
+            results[name], confident[name], timings[f"{name}_ms"] = [], False, None
+
+def retrieve(query: str, query_type: str = None) -> dict:
+    """
+    Route the query to the backends its type calls for and run them concurrently.
+
+    A routed (single-backend) plan is escalated to hybrid when the first
+    backend is not confident in its results: the graph unless an explicit
+    relation rule matched, either backend when it returns fewer than
+    settings.ESCALATION_MIN_RESULTS.
+    Company, form type and fiscal year constraints found in the query scope
+    every backend to the matching documents.
+
+    Returns:
+        dict: {"vector": [...], "graph": [...], "plan": [...], "filters": {...}, "timings": {stage: ms}}
+    """
+    start = time.perf_counter()
+    query_type = query_type or classify_query_type(query)
+    filters = extract_filters(query)
+    if filters:
+        logger.info(f"Scoping retrieval to {filters}")
+    backends = plan_retrieval(query_type)
+    results, timings, confident = {"vector": [], "graph": []}, {}, {}
+    _run_backends(query, backends, result_limits(backends), results, timings, filters, confident)
+
+    plan = list(backends)
+    if len(backends) == 1 and not confident.get(backends[0]):
+        remaining = tuple(name for name in PLANS["hybrid"] if name not in backends)
+        logger.info(
+            f"Escalating {query_type} query to hybrid: {backends[0]} returned "
+            f"{len(results[backends[0]])} low-confidence results."
+        )
+        _run_backends(query, remaining, result_limits(PLANS["hybrid"]), results, timings, filters)
+        plan += remaining
+
+    timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
+    return {
+        "vector": results["vector"], "graph": results["graph"], "plan": plan, "filters": filters, "timings": timings
+    }
+
+def compact_context(query: str, retrieved: dict) -> dict:
+    """Deduplicate and budget the retrieved context in place; returns prompt token stats."""
+    retrieved["vector"], retrieved["graph"], stats = build_context(retrieved["vector"], retrieved["graph"])
+    stats["prompt_tokens"] = estimate_tokens(build_prompt(query, retrieved["vector"], retrieved["graph"]))
+    logger.info(f"Prompt context: {stats}")
+    return stats
+
+def answer_query(query: str) -> tuple:
+    """
+    Retrieve from the routed backends, then synthesize an answer.
+
+    Returns:
+        tuple: (response text, per-stage timings in ms and the executed plan)
+    """
+    start = time.perf_counter()
+    retrieved = retrieve(query)
+    context_stats = compact_context(query, retrieved)
+    response, synthesis_ms = _timed(synthesize_response, query, retrieved["vector"], retrieved["graph"])
+    timings = dict(
+        retrieved["timings"],
+        **context_stats,
+        plan=retrieved["plan"],
+        synthesis_ms=synthesis_ms,
+        total_ms=(time.perf_counter() - start) * 1000,
+    )
+    logger.info(f"Query timings: {timings}")
+    return response, timings
+
+def stream_answer(query: str, answer_cache=None):
+    """
+    Streaming counterpart of answer_query.
+
+    With a SemanticAnswerCache, a cached answer for a similar question over
+    the same retrieved context is returned instead of calling the LLM.
+
+    Yields:
+        tuple: ("stage", name) when a stage starts, ("token", text) for each
+        piece of the answer, ("error", message) if synthesis failed part-way,
+        ("cache", fields) with the fields to store on the history record when
+        a cache is given and a new, complete answer was synthesized, and
+        finally ("timings", dict) including time-to-first-token.
+    """
+    start = time.perf_counter()
+    yield "stage", "retrieving"
+    retrieved = retrieve(query)
+    context_stats = compact_context(query, retrieved)
+    fingerprint = context_fingerprint(retrieved["vector"], retrieved["graph"])
+    cached = None
+    if answer_cache is not None:
+        try:
+            cached = answer_cache.lookup(query, fingerprint)
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+
+    synthesis_start = time.perf_counter()
+    first_token_ms = None
+    failed = False
+    if cached is not None:
+        yield "stage", "cached"
+        first_token_ms = (time.perf_counter() - start) * 1000
+        yield "token", cached
+        response = cached
+    else:
+        yield "stage", "synthesizing"
+        response = ""
+        try:
+            for piece in stream_response(query, retrieved["vector"], retrieved["graph"], raise_errors=True):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                response += piece
+                yield "token", piece
+        except Exception as e:
+            # The partial answer stays visible but must never be cached
+            failed = True
+            error = f"[Error during response synthesis: {e}]"
+            response += error
+            yield "token", error
+            yield "error", str(e)
+    now = time.perf_counter()
+
+    # Re-storing a cache hit would refresh its cached_at and make the TTL a sliding window
+    if answer_cache is not None and cached is None and not failed and is_cacheable(response.strip()):
+        try:
+            yield "cache", answer_cache.fields(query, fingerprint)
+        except Exception as e:
+            logger.warning(f"Could not prepare answer cache fields: {e}")
+    timings = dict(
+        retrieved["timings"],
+        **context_stats,
+        plan=retrieved["plan"],
+        cache_hit=cached is not None,
+        synthesis_failed=failed,
+        synthesis_ms=(now - synthesis_start) * 1000,
+        first_token_ms=first_token_ms,
+        total_ms=(now - start) * 1000,
+    )
+    logger.info(f"Query timings: {timings}")
+    yield "timings", timings
@@ -1,5 +1,13 @@
 # src/agents/query_analysis.py
+import os
+import re
 from typing import Literal
+from src.ingestion.manifest import load_manifest
+from src.utils.doc_metadata import FILTER_FIELDS, FORM_PATTERN, normalize_form, parse_filename, query_years, matches
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
 
 QueryType = Literal["graph", "vector", "hybrid"]
 
@@ -16,12 +24,95 @@ def classify_query_type(query: str) -> QueryType:
 
     vector_keywords = [
         "explain", "describe", "summarize", "what is", "give an overview",
-        "insight", "details", "products", "sell", "overview"
+        "insight", "details", "products", "sell", "sells", "overview"
     ]
 
-    if any(k in query for k in graph_keywords):
+    def mentions(keywords):
+        # Whole words only, so "who" does not match inside "wholesale"
+        return any(re.search(rf"\b{re.escape(k)}\b", query) for k in keywords)
+
+    if mentions(graph_keywords):
         return "graph"
-    elif any(k in query for k in vector_keywords):
+    elif mentions(vector_keywords):
         return "vector"
     else:
-        return "hybrid"
\ No newline at end of file
+        return "hybrid"
+
+# Filename metadata of ingested documents and the stored chunks each one repeats,
+# reloaded whenever the manifest is rewritten
+_catalog = {"mtime": None, "documents": {}, "links": {}}
+
+def _load_catalog():
+    try:
+        mtime = os.stat(settings.INGEST_MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return {"documents": {}, "links": {}}
+    if mtime != _catalog["mtime"]:
+        manifest = load_manifest()
+        _catalog["documents"] = {filename: parse_filename(filename) for filename in manifest}
+        _catalog["links"] = {
+            filename: set(entry["duplicate_of"].values())
+            for filename, entry in manifest.items() if entry.get("duplicate_of")
+        }
+        _catalog["mtime"] = mtime
+    return _catalog
+
+def document_catalog() -> dict:
+    """{filename: {"company", "form", "year"}} for every ingested document."""
+    return _load_catalog()["documents"]
+
+def duplicate_links(sources) -> dict:
+    """
+    {filename: stored chunk IDs it repeats} for the given documents that had
+    chunks skipped as duplicates, so scoped search can still reach that content.
+    """
+    if not sources:
+        return {}
+    links = _load_catalog()["links"]
+    return {source: links[source] for source in sources if source in links}
+
+def matching_sources(filters: dict):
+    """Filenames of the documents satisfying filters, or None when the query is unscoped."""
+    if not filters:
+        return None
+    return {filename for filename, metadata in document_catalog().items() if matches(metadata, filters)}
+
+# Constraints kept first when not all of them can be satisfied together
+FILTER_PRIORITY = ("company", "year", "form")
+
+def company_pattern(company: str) -> str:
+    """Regex for a company name in a question, allowing any separator between its words."""
+    words = re.split(r"[\s\-]+", company)
+    return r"(?<!\w)" + r"[\s\-]*".join(re.escape(word) for word in words) + r"(?!\w)"
+
+def extract_filters(query: str) -> dict:
+    """
+    Company, form type and fiscal year constraints mentioned in the query.
+
+    Only values that occur in the ingested corpus are kept. When no document
+    satisfies every constraint, only the ones that cannot be satisfied are
+    dropped, keeping the company over the year and the year over the form
+    type, so the query is never scoped to an empty set.
+
+    Returns:
+        dict: {field: [allowed values]} for the fields the query constrains.
+    """
+    known = {field: set() for field in FILTER_FIELDS}
+    for metadata in document_catalog().values():
+        for field, value in metadata.items():
+            known[field].add(value)
+    text = query.lower()
+    found = {
+        "company": [c for c in sorted(known["company"]) if re.search(company_pattern(c), text)],
+        "form": sorted({normalize_form(f) for f in FORM_PATTERN.findall(query)} & known["form"]),
+        "year": sorted(query_years(query) & known["year"]),
+    }
+    filters = {field: values for field, values in found.items() if values}
+    if not filters or matching_sources(filters):
+        return filters
+    kept = {}
+    for field in FILTER_PRIORITY:
+        if field in filters and matching_sources({**kept, field: filters[field]}):
+            kept[field] = filters[field]
+    logger.info(f"No ingested document matches {filters}; scoping to {kept or 'the whole corpus'}.")
+    return kept
@@ -1,18 +1,13 @@
-import google.generativeai as genai
-from config.settings import settings
+from src.agents.llm_backends import create_backend
 
-# Configure Gemini
+# Configure the synthesis backend (settings.LLM_MODEL)
 try:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    backend = create_backend()
 except Exception as e:
-    print("[Gemini Config Error]", str(e))
-    model = None
-
-def synthesize_response(user_query: str, vector_result: list = None, graph_result: list = None) -> str:
-    if model is None:
-        return "[Error: Gemini model not initialized]"
+    print("[LLM Config Error]", str(e))
+    backend = None
 
+def build_prompt(user_query: str, vector_result: list = None, graph_result: list = None) -> str:
     # Prepare vector text
     vector_text = "\n".join(vector_result) if vector_result and vector_result else "No relevant documents found."
 
@@ -20,7 +15,7 @@ def synthesize_response(user_query: str, vector_result: list = None, graph_resul
     graph_text = "\n".join(graph_result) if graph_result and graph_result else "No graph facts found."
 
     # Construct the prompt
-    prompt = f"""
+    return f"""
 You are an intelligent assistant. A user asked the following question:
 
 "{user_query}"
@@ -35,9 +30,49 @@ Graph Facts:
 Based on the information above, generate a helpful and concise answer to the user's question.
 """
 
+def synthesize_response(user_query: str, vector_result: list = None, graph_result: list = None) -> str:
+    if backend is None:
+        return "[Error: LLM backend not initialized]"
+
+    prompt = build_prompt(user_query, vector_result, graph_result)
+
+    try:
+        return backend.generate(prompt)
+    except Exception as e:
+        print(f"[Error during response synthesis: {str(e)}]")
+        return f"[Error during response synthesis: {str(e)}]"
+
+async def asynthesize_response(user_query: str, vector_result: list = None, graph_result: list = None) -> str:
+    """Async variant of synthesize_response; shares the backend's concurrency limit."""
+    if backend is None:
+        return "[Error: LLM backend not initialized]"
+
+    prompt = build_prompt(user_query, vector_result, graph_result)
+
+    try:
+        return await backend.agenerate(prompt)
+    except Exception as e:
+        print(f"[Error during response synthesis: {str(e)}]")
+        return f"[Error during response synthesis: {str(e)}]"
+
+def stream_response(user_query: str, vector_result: list = None, graph_result: list = None, raise_errors: bool = False):
+    """
+    Yield the answer text piece by piece as the model generates it.
+    With raise_errors, a failure raises instead of yielding an error message,
+    so callers can tell a truncated answer from a complete one.
+    """
+    if backend is None:
+        if raise_errors:
+            raise RuntimeError("LLM backend not initialized")
+        yield "[Error: LLM backend not initialized]"
+        return
+
+    prompt = build_prompt(user_query, vector_result, graph_result)
+
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        yield from backend.stream(prompt)
     except Exception as e:
-        print(f"[Error during Gemini response synthesis: {str(e)}]")
-        return f"[Error during response synthesis: {str(e)}]"
\ No newline at end of file
+        print(f"[Error during response synthesis: {str(e)}]")
+        if raise_errors:
+            raise
+        yield f"[Error during response synthesis: {str(e)}]"
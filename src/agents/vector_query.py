@@ -1,30 +1,120 @@
 # src/agents/vector_query.py
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+import numpy as np
+from src.storage.vector_store import collection, embedding_function, collection_version
+from src.storage.sparse_index import sparse_index, reciprocal_rank_fusion
+from src.storage.compact_store import compact_index
+from src.agents.query_analysis import matching_sources, duplicate_links
+from src.utils.doc_metadata import chroma_where
+from src.utils.cache import TTLCache
+from src.utils.logger import get_logger
 from config.settings import settings
-import chromadb
 
-embedding_function = SentenceTransformerEmbeddingFunction(model_name=settings.EMBEDDING_MODEL)
+logger = get_logger(__name__)
 
-client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIRECTORY)
+# Query embeddings do not depend on the collection, so they outlive index writes
+embedding_cache = TTLCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+# Results are keyed by collection version, so any write makes old entries unreachable
+result_cache = TTLCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
 
-collection = client.get_or_create_collection(
-    name=settings.VECTOR_COLLECTION_NAME,
-    embedding_function=embedding_function
-)
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
 
-def query_chromadb(query: str, top_k: int = 5):
+def embed_query(query: str):
+    key = normalize_query(query)
+    embedding = embedding_cache.get(key)
+    if embedding is None:
+        embedding = embedding_function([query])[0]
+        embedding_cache.set(key, embedding)
+    return embedding
+
+def cache_stats():
+    """Hit-rate metrics for the query embedding and result caches."""
+    return {"embeddings": embedding_cache.stats(), "results": result_cache.stats()}
+
+def search_scope(filters: dict):
+    """
+    Documents matching filters and the stored chunks they repeat (their own
+    copies were skipped as duplicates), or (None, {}) when the query is unscoped.
+    """
+    sources = matching_sources(filters)
+    return sources, duplicate_links(sources)
+
+def dense_search(query: str, n_results: int, filters: dict = None):
+    """
+    Nearest chunks to the query embedding, from the compact index when
+    COMPACT_VECTOR_STORE is set and from Chroma's HNSW index otherwise.
+    Metadata filters are applied before the search (a where clause for
+    Chroma, the matching documents' row ranges for the compact index).
+
+    Returns:
+        tuple: (ranked chunk IDs, {chunk_id: document} for the IDs already fetched).
+    """
+    query_embedding = embed_query(query)
+    sources, links = search_scope(filters)
+    if settings.COMPACT_VECTOR_STORE:
+        linked = set().union(*links.values())
+        hits = compact_index.search(query_embedding, n_results, sources=sources, chunk_ids=linked)
+        return [chunk_id for chunk_id, _ in hits], {}
+    dense = collection.query(
+        query_embeddings=[query_embedding], n_results=n_results, where=chroma_where(sources, links)
+    )
+    dense_ids = dense["ids"][0] if dense and dense.get("ids") else []
+    return dense_ids, dict(zip(dense_ids, dense["documents"][0])) if dense_ids else {}
+
+def fetch_documents(chunk_ids, documents=None):
+    """Documents for chunk_ids in order, fetching any not already in documents from Chroma."""
+    documents = dict(documents or {})
+    missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in documents]
+    if missing:
+        fetched = collection.get(ids=missing, include=["documents"])
+        documents.update(zip(fetched["ids"], fetched["documents"]))
+    return [documents[chunk_id] for chunk_id in chunk_ids if chunk_id in documents]
+
+def hybrid_search(query: str, top_k: int, filters: dict = None) -> list:
+    """
+    Fuse dense (Chroma or compact index) and sparse (BM25) rankings with reciprocal-rank fusion.
+
+    Each retriever contributes top_k * HYBRID_CANDIDATE_FACTOR candidates; with
+    HYBRID_RERANK the fused candidates are re-scored by cosine similarity
+    against the cached query embedding before the top_k are returned.
+    """
+    n_candidates = top_k * settings.HYBRID_CANDIDATE_FACTOR
+    dense_ids, documents = dense_search(query, n_candidates, filters)
+    sources, links = search_scope(filters)
+    sparse_hits = sparse_index.search(query, n_candidates, sources=sources, chunk_ids=set().union(*links.values()))
+    sparse_ids = [chunk_id for chunk_id, _ in sparse_hits]
+
+    fused = reciprocal_rank_fusion([dense_ids, sparse_ids], k=settings.RRF_K)
+    if settings.HYBRID_RERANK:
+        candidates = collection.get(ids=fused, include=["documents", "embeddings"])
+        if candidates["ids"]:
+            matrix = np.asarray(candidates["embeddings"], dtype=np.float32)
+            q = np.asarray(embed_query(query), dtype=np.float32)
+            scores = matrix @ q / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(q) + 1e-12)
+            order = np.argsort(-scores)[:top_k]
+            return [candidates["documents"][i] for i in order]
+
+    return fetch_documents(fused[:top_k], documents)
+
+def query_chromadb(query: str, top_k: int = 5, filters: dict = None):
     global collection
     if not collection:
         print("[Vector Query Warning] Collection is not initialized.")
         return []
+    scope = tuple(sorted((field, tuple(values)) for field, values in (filters or {}).items()))
+    key = (normalize_query(query), top_k, scope, collection_version())
+    cached = result_cache.get(key)
+    if cached is not None:
+        logger.info(f"Vector cache hit (hit rate {result_cache.stats()['hit_rate']:.2%})")
+        return list(cached)
     try:
-        results = collection.query(
-            query_texts=[query],
-            n_results=top_k
-        )
-        documents = results['documents'][0] if results and 'documents' in results else []
+        if settings.HYBRID_SEARCH:
+            documents = hybrid_search(query, top_k, filters)
+        else:
+            documents = fetch_documents(*dense_search(query, top_k, filters))
         print(f"Retrieved {len(documents)} documents: {documents}")
+        result_cache.set(key, tuple(documents))
         return documents
     except Exception as e:
         print(f"[Vector Query Error] {e}")
-        return []
\ No newline at end of file
+        return []
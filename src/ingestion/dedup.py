@@ -0,0 +1,158 @@
+# src/ingestion/dedup.py
+"""
+Pre-embedding chunk deduplication.
+
+Exact duplicates are caught by a SHA-1 of the normalized text; near
+duplicates (boilerplate differing in wording or a company name) by MinHash
+signatures over word shingles, looked up through banded LSH buckets. A
+near duplicate must also repeat every number of the stored chunk, so a
+paragraph whose date or figures changed is treated as new content.
+Skipped chunks are linked to the stored chunk they duplicate instead of
+being embedded again.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+from config.settings import settings
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+PRIME = 4294967311  # first prime above 2**32, so (a * h + b) stays within uint64
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+def normalize(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+def numbers_digest(normalized):
+    """Digest of the numeric tokens, in order; near duplicates must agree on it."""
+    numbers = " ".join(word for word in normalized.split() if any(c.isdigit() for c in word))
+    return hashlib.sha1(numbers.encode("utf-8")).hexdigest()
+
+def minhash(text, shingle_size=3):
+    """MinHash signature of the text's word shingles."""
+    words = text.split()
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return ((np.outer(hashes, _A) + _B) % PRIME).min(axis=0)
+
+def _bands(signature):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+class ChunkDeduplicator:
+    """Exact-hash and MinHash index of stored chunks, persisted between ingestion runs."""
+
+    def __init__(self, path=None, threshold=None):
+        self.path = path or settings.DEDUP_STATE_PATH
+        self.threshold = settings.DEDUP_JACCARD_THRESHOLD if threshold is None else threshold
+        self.exact = {}
+        self.signatures = {}
+        self.buckets = {}
+        self.skipped = 0
+        self.seen = 0
+        self._lock = threading.Lock()
+
+    def _add(self, chunk_id, digest, signature, numbers):
+        self.exact.setdefault(digest, chunk_id)
+        self.signatures[chunk_id] = (digest, signature, numbers)
+        for band in _bands(signature):
+            self.buckets.setdefault(band, []).append(chunk_id)
+
+    def _near_duplicate(self, signature, numbers):
+        for band in _bands(signature):
+            for chunk_id in self.buckets.get(band, []):
+                entry = self.signatures.get(chunk_id)
+                if entry is None or entry[2] != numbers:
+                    continue
+                # The fraction of equal MinHash values estimates Jaccard similarity
+                if np.mean(entry[1] == signature) >= self.threshold:
+                    return chunk_id
+        return None
+
+    def filter(self, chunk_ids, texts):
+        """
+        Split chunks into ones to embed and duplicates of already stored chunks.
+
+        Kept chunks are registered immediately, so duplicates within the same
+        document are caught too; callers remove() them again if storing fails.
+
+        Returns:
+            tuple: (indices of chunks to keep, {duplicate chunk ID: stored chunk ID})
+        """
+        keep, duplicate_of = [], {}
+        with self._lock:
+            for i, (chunk_id, text) in enumerate(zip(chunk_ids, texts)):
+                normalized = normalize(text)
+                digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+                signature = minhash(normalized)
+                numbers = numbers_digest(normalized)
+                original = self.exact.get(digest) or self._near_duplicate(signature, numbers)
+                if original is not None and original != chunk_id:
+                    duplicate_of[chunk_id] = original
+                else:
+                    keep.append(i)
+                    self._add(chunk_id, digest, signature, numbers)
+            self.seen += len(chunk_ids)
+            self.skipped += len(duplicate_of)
+        return keep, duplicate_of
+
+    def remove(self, chunk_ids):
+        """Forget removed chunks so they no longer count as originals."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                entry = self.signatures.pop(chunk_id, None)
+                if entry is None:
+                    continue
+                if self.exact.get(entry[0]) == chunk_id:
+                    del self.exact[entry[0]]
+                for band in _bands(entry[1]):
+                    bucket = self.buckets.get(band, [])
+                    if chunk_id in bucket:
+                        bucket.remove(chunk_id)
+
+    def savings(self):
+        """Chunks seen and skipped since this deduplicator was created."""
+        return {
+            "seen": self.seen,
+            "skipped": self.skipped,
+            "skipped_ratio": self.skipped / self.seen if self.seen else 0.0,
+        }
+
+    def load(self):
+        """Load state saved by save(): chunk IDs and digests as JSON, signatures as a .npy matrix."""
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            matrix = np.load(f"{self.path}.npy")
+            # State saved before number digests existed only matches exact duplicates
+            numbers = state.get("numbers", [None] * len(state["chunk_ids"]))
+            for chunk_id, digest, signature, number in zip(state["chunk_ids"], state["digests"], matrix, numbers):
+                self._add(chunk_id, digest, signature, number)
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            chunk_ids = list(self.signatures)
+            digests = [self.signatures[c][0] for c in chunk_ids]
+            numbers = [self.signatures[c][2] for c in chunk_ids]
+            matrix = np.asarray(
+                [self.signatures[c][1] for c in chunk_ids], dtype=np.uint64
+            ).reshape(-1, NUM_PERMUTATIONS)
+        # Write the signatures first; the JSON file is what marks a saved state as complete
+        with open(f"{self.path}.npy.tmp", "wb") as f:
+            np.save(f, matrix)
+        os.replace(f"{self.path}.npy.tmp", f"{self.path}.npy")
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump({"chunk_ids": chunk_ids, "digests": digests, "numbers": numbers}, f)
+        os.replace(f"{self.path}.tmp", self.path)
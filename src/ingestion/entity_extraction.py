@@ -1,17 +1,7 @@
 import os
-from transformers import pipeline
-import fitz  # PyMuPDF
-
-# Set up NER model
-ner_pipeline = pipeline("ner", model="dslim/bert-base-NER", aggregation_strategy="simple")
-
-def extract_text_from_pdf(file_path):
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-    return text
+from src.ingestion.text_extraction import extract_text_from_pdf
+from src.utils.ner_utils import run_ner
+from src.utils.model_registry import get_ner_pipeline
 
 def enhance_entities(ner_results):
     # Merges nearby entities, filters invalid ones, and standardizes
@@ -42,7 +32,7 @@ def extract_entities_from_pdf(pdf_path):
     text = extract_text_from_pdf(pdf_path)
 
     # Step 2: Apply NER
-    ner_results = ner_pipeline(text)
+    ner_results = run_ner(get_ner_pipeline(), text)
 
     # Step 3: Enhance Entities
     enhanced_entities = enhance_entities(ner_results)
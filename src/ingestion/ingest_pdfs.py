@@ -1,32 +1,244 @@
 # src/ingestion/ingest_pdfs.py
-from src.ingestion.text_extraction import extract_text_from_pdf
-from src.ingestion.relation_extraction import extract_triplets
-from src.storage.vector_store import store_text_chunks
-from src.storage.graph_store import GraphStore
-from src.utils.text_utils import split_text
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from queue import Queue
+from src.ingestion.manifest import load_manifest, save_manifest, needs_ingestion, make_entry
+from src.ingestion.pipeline import init_worker, process_document
+from src.ingestion.dedup import ChunkDeduplicator
+from src.utils.text_utils import TextSpans
+from src.storage.vector_store import store_text_chunks, delete_chunks, link_duplicates, bump_collection_version
+from src.storage.graph_store import GraphStore
+from src.storage import sparse_index, compact_store
+from src.utils.entity_resolver import get_resolver, canonicalize_triplets
+from src.utils.embedding_cache import get_embedding_cache
 from config.settings import settings
 
-def ingest_pdfs():
-    graph_store = GraphStore()
+def remove_document(graph_store, filename, entry, deduplicator=None):
+    """Delete the chunks and edges a previous ingestion of filename produced."""
+    link_duplicates(filename, entry.get("duplicate_of", {}).values(), linked=False)
+    delete_chunks(entry.get("chunk_ids", []))
+    if deduplicator is not None:
+        deduplicator.remove(entry.get("chunk_ids", []))
+    sparse_index.remove_segment(filename)
+    compact_store.remove_segment(filename)
+    graph_store.delete_source(filename)
+    print(f"Removed stale chunks and triplets for {filename}.")
+
+def dedupe_chunks(deduplicator, filename, chunks, metadatas):
+    """
+    Drop chunks that duplicate already stored ones before they are embedded.
+
+    Returns:
+        tuple: (chunks, metadatas, chunk IDs) to store, and {skipped ID: stored ID}
+    """
+    chunk_ids = [f"{filename}_{i}" for i in range(len(chunks))]
+    if deduplicator is None:
+        return chunks, metadatas, chunk_ids, {}
+    keep, duplicate_of = deduplicator.filter(chunk_ids, chunks)
+    if duplicate_of:
+        print(f"Skipped {len(duplicate_of)} of {len(chunks)} chunks from {filename} as duplicates.")
+    kept = chunks.subset(keep) if isinstance(chunks, TextSpans) else [chunks[i] for i in keep]
+    return kept, [metadatas[i] for i in keep], [chunk_ids[i] for i in keep], duplicate_of
+
+def dependent_documents(manifest, removed):
+    """
+    Documents whose skipped duplicates point at chunks of the removed ones,
+    followed transitively, since re-ingesting a document removes its chunks too.
+    """
+    removed = set(removed)
+    dependents = set()
+    while True:
+        removed_ids = {c for filename in removed for c in manifest[filename].get("chunk_ids", [])}
+        found = {
+            filename for filename, entry in manifest.items()
+            if filename not in removed and removed_ids & set(entry.get("duplicate_of", {}).values())
+        }
+        if not found:
+            return dependents
+        dependents |= found
+        removed |= found
+
+def plan_ingestion(graph_store, manifest, deduplicator=None):
+    """
+    Compare the raw directory against the manifest.
+
+    Stale data for changed and removed files is deleted here, so the returned
+    files can be ingested from scratch. Unchanged documents that had chunks
+    skipped as duplicates of removed chunks are re-ingested as well, so that
+    content is stored again. The manifest entries of all of them are dropped
+    until their re-ingestion completes.
+
+    Returns:
+        dict: filename -> content hash for every PDF that needs ingestion.
+    """
     pdf_dir = settings.RAW_DATA_DIR
+    pending = {}
+    present = set()
     for filename in os.listdir(pdf_dir):
         if filename.endswith(".pdf"):
+            present.add(filename)
             pdf_path = os.path.join(pdf_dir, filename)
-            print(f"Processing {filename}")
-            text = extract_text_from_pdf(pdf_path)
-            if text:
-                # Split and store text chunks in ChromaDB
-                chunks = split_text(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
-                store_text_chunks(chunks, filename)
-                print(f"Stored {len(chunks)} chunks from {filename} in ChromaDB.")
-                # Extract and store triplets in Neo4j
-                triplets = extract_triplets(text)
-                for subject, predicate, obj in triplets:
-                    graph_store.create_triplet(subject, predicate, obj)
-                print(f"Stored {len(triplets)} triplets from {filename} in Neo4j.")
-            else:
-                print(f"No text extracted from {filename}")
+            entry = manifest.get(filename)
+            changed, digest = needs_ingestion(entry, pdf_path)
+            if not changed:
+                if digest is not None:
+                    # Touched but identical content: refresh mtime so it is not re-hashed next run
+                    manifest[filename] = make_entry(
+                        pdf_path, digest, entry["chunk_ids"], entry["triplet_count"], entry.get("duplicate_of")
+                    )
+                print(f"Skipping unchanged {filename}")
+                continue
+            pending[filename] = digest
+
+    stale = [filename for filename in pending if filename in manifest] + sorted(set(manifest) - present)
+    for filename in sorted(dependent_documents(manifest, stale)):
+        print(f"Re-ingesting {filename}: chunks it repeats are being removed")
+        pending[filename] = manifest[filename]["hash"]
+        stale.append(filename)
+    for filename in stale:
+        remove_document(graph_store, filename, manifest[filename], deduplicator)
+    # Their data is gone: drop the entries so a failed or interrupted re-ingestion is retried next run
+    for filename in stale:
+        del manifest[filename]
+    save_manifest(manifest)
+    return pending
+
+def ingest_pdfs():
+    """
+    Ingest new and changed PDFs as a staged pipeline.
+
+    PDF extraction, chunking and NER run in a process pool; embedding and
+    graph writes run as consumer threads fed through bounded queues, so a
+    slow stage applies backpressure instead of buffering whole filings.
+    """
+    graph_store = GraphStore()
+    manifest = load_manifest()
+    deduplicator = ChunkDeduplicator().load() if settings.DEDUP_CHUNKS else None
+    pending = plan_ingestion(graph_store, manifest, deduplicator)
+    if deduplicator is not None:
+        deduplicator.save()
+    if not pending:
+        # Removed files may still need to be dropped from the lexical and compact indexes
+        rebuilt = sparse_index.build_if_stale()
+        if settings.COMPACT_VECTOR_STORE:
+            rebuilt = compact_store.build_if_stale() or rebuilt
+        if rebuilt:
+            bump_collection_version()
+        print("Nothing to ingest.")
+        return
+
+    embed_queue = Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    graph_queue = Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    lock = threading.Lock()
+    done = {filename: {} for filename in pending}
+
+    def finish(filename, **fields):
+        # Record a stage result; the manifest entry is written once both stages are done
+        with lock:
+            done[filename].update(fields)
+            if "chunk_ids" in done[filename] and "triplet_count" in done[filename]:
+                pdf_path = os.path.join(settings.RAW_DATA_DIR, filename)
+                manifest[filename] = make_entry(
+                    pdf_path, pending[filename], done[filename]["chunk_ids"], done[filename]["triplet_count"],
+                    done[filename]["duplicate_of"]
+                )
+                save_manifest(manifest)
+
+    def embed_stage():
+        while (item := embed_queue.get()) is not None:
+            filename, chunks, metadatas = item
+            chunk_ids = []
+            try:
+                chunks, metadatas, chunk_ids, duplicate_of = dedupe_chunks(deduplicator, filename, chunks, metadatas)
+                if chunks:
+                    store_text_chunks(chunks, filename, metadatas=metadatas, chunk_ids=chunk_ids)
+                link_duplicates(filename, duplicate_of.values())
+            except Exception as e:
+                # Left out of the manifest, so the file is retried on the next run; its chunks
+                # were never stored, so later documents must not be deduplicated against them
+                if deduplicator is not None:
+                    deduplicator.remove(chunk_ids)
+                print(f"[Ingestion Error] Embedding {filename} failed: {e}")
+                continue
+            finish(filename, chunk_ids=chunk_ids, duplicate_of=duplicate_of)
+
+    def graph_stage():
+        while (item := graph_queue.get()) is not None:
+            filename, triplets = item
+            try:
+                # Workers resolve names independently; re-resolve here so every process agrees
+                written = graph_store.create_triplets(canonicalize_triplets(triplets), source=filename)
+            except Exception as e:
+                print(f"[Ingestion Error] Graph write for {filename} failed: {e}")
+                continue
+            print(f"Stored {written} triplets from {filename} in Neo4j.")
+            finish(filename, triplet_count=written)
+
+    consumers = (
+        [threading.Thread(target=embed_stage) for _ in range(settings.INGEST_EMBED_WORKERS)]
+        + [threading.Thread(target=graph_stage) for _ in range(settings.INGEST_GRAPH_WORKERS)]
+    )
+    for thread in consumers:
+        thread.start()
+
+    workers = settings.INGEST_WORKERS
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(workers,),
+        ) as pool:
+            in_flight, in_flight_paths = set(), {}
+            paths = [os.path.join(settings.RAW_DATA_DIR, f) for f in pending]
+            while paths or in_flight:
+                # Keep at most two documents per worker in flight
+                while paths and len(in_flight) < 2 * workers:
+                    path = paths.pop()
+                    print(f"Processing {os.path.basename(path)}")
+                    future = pool.submit(process_document, path)
+                    in_flight.add(future)
+                    in_flight_paths[future] = os.path.basename(path)
+                completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    try:
+                        filename, chunks, metadatas, triplets = future.result()
+                    except Exception as e:
+                        # Left out of the manifest, so the file is retried on the next run
+                        print(f"[Ingestion Error] Processing {in_flight_paths.pop(future)} failed: {e}")
+                        continue
+                    del in_flight_paths[future]
+                    if not chunks:
+                        print(f"No text extracted from {filename}")
+                    embed_queue.put((filename, chunks, metadatas))
+                    graph_queue.put((filename, triplets))
+    finally:
+        for _ in range(settings.INGEST_EMBED_WORKERS):
+            embed_queue.put(None)
+        for _ in range(settings.INGEST_GRAPH_WORKERS):
+            graph_queue.put(None)
+        for thread in consumers:
+            thread.join()
+        get_resolver().save()
+        embedding_cache = get_embedding_cache()
+        if embedding_cache is not None:
+            embedding_cache.flush()
+            stats = embedding_cache.stats()
+            print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%}).")
+        if deduplicator is not None:
+            deduplicator.save()
+            savings = deduplicator.savings()
+            print(
+                f"Deduplication skipped {savings['skipped']} of {savings['seen']} chunks "
+                f"({savings['skipped_ratio']:.1%}) before embedding."
+            )
+        sparse_index.build()
+        if settings.COMPACT_VECTOR_STORE:
+            compact_store.build()
+        # Invalidate query caches filled while the lexical and compact indexes were still stale
+        bump_collection_version()
 
 if __name__ == "__main__":
-    ingest_pdfs()
\ No newline at end of file
+    ingest_pdfs()
@@ -0,0 +1,60 @@
+# src/ingestion/manifest.py
+import hashlib
+import json
+import os
+from config.settings import settings
+
+def load_manifest(path=None):
+    """Load the ingestion manifest, or an empty one if none exists yet."""
+    path = path or settings.INGEST_MANIFEST_PATH
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=None):
+    """Write the manifest atomically so an interrupted run never leaves it half-written."""
+    path = path or settings.INGEST_MANIFEST_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def needs_ingestion(entry, path):
+    """
+    Decide whether a file must be (re-)ingested.
+
+    The mtime and size are checked first so unchanged files are never hashed;
+    a touched file whose content hash still matches is not re-ingested.
+
+    Returns:
+        tuple: (needs_ingestion, content_hash or None if not computed)
+    """
+    if entry is None:
+        return True, file_hash(path)
+    stat = os.stat(path)
+    if entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+        return False, None
+    digest = file_hash(path)
+    return digest != entry.get("hash"), digest
+
+def make_entry(path, digest, chunk_ids, triplet_count, duplicate_of=None):
+    stat = os.stat(path)
+    return {
+        "hash": digest,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "chunk_ids": chunk_ids,
+        "triplet_count": triplet_count,
+        # Chunks skipped as duplicates, linked to the stored chunk they repeat
+        "duplicate_of": duplicate_of or {},
+    }
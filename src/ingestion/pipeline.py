@@ -0,0 +1,82 @@
+# src/ingestion/pipeline.py
+"""
+CPU-bound ingestion stages that run inside worker processes.
+Kept free of storage imports so spawned workers never open database clients.
+"""
+
+import os
+from bisect import bisect_right
+from src.ingestion.text_extraction import iter_pdf_pages
+from src.ingestion.relation_extraction import extract_weighted_triplets
+from src.utils.model_registry import get_embedding_tokenizer
+from src.utils.text_utils import split_pages, chunk_spans, TextSpans
+from src.utils.doc_metadata import parse_filename
+from config.settings import settings
+
+def init_worker(num_workers):
+    """Split the machine's cores between workers so torch does not oversubscribe them."""
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // num_workers))
+
+def chunk_by_characters(pdf_path):
+    """
+    Fixed-size character chunks with their page ranges; returns (text, chunks, metadatas).
+    Pages are read one at a time, but the whole document text is still joined
+    for relation extraction, so peak memory stays one document's text.
+    """
+    page_texts = []
+
+    def pages():
+        for page_number, text in iter_pdf_pages(pdf_path):
+            page_texts.append(text)
+            yield page_number, text
+
+    chunks, metadatas = [], []
+    for chunk, first_page, last_page in split_pages(pages(), settings.CHUNK_SIZE, settings.CHUNK_OVERLAP):
+        chunks.append(chunk)
+        metadatas.append({"page_start": first_page, "page_end": last_page})
+    return "".join(page_texts), chunks, metadatas
+
+def chunk_by_sentences(pdf_path):
+    """
+    Sentence/section-aware token-sized chunks; returns (text, chunks, metadatas).
+    Chunk boundaries may cross pages, so the full text is assembled before chunking.
+    """
+    page_starts, page_numbers, page_texts, total = [], [], [], 0
+    for page_number, text in iter_pdf_pages(pdf_path):
+        page_starts.append(total)
+        page_numbers.append(page_number)
+        page_texts.append(text)
+        total += len(text)
+    text = "".join(page_texts)
+
+    spans = list(chunk_spans(
+        text, get_embedding_tokenizer(), settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS
+    ))
+    metadatas = [
+        {
+            "page_start": page_numbers[bisect_right(page_starts, start) - 1],
+            "page_end": page_numbers[bisect_right(page_starts, end - 1) - 1],
+        }
+        for start, end in spans
+    ]
+    return text, TextSpans(text, spans), metadatas
+
+def process_document(pdf_path):
+    """
+    Extract text, chunks and triplets for one PDF. Chunk metadata carries
+    the page range plus the company, form type and year parsed from the filename.
+
+    Returns:
+        tuple: (filename, chunks, chunk metadata, triplets)
+    """
+    filename = os.path.basename(pdf_path)
+    if settings.CHUNK_STRATEGY == "characters":
+        text, chunks, metadatas = chunk_by_characters(pdf_path)
+    else:
+        text, chunks, metadatas = chunk_by_sentences(pdf_path)
+    if not chunks:
+        return filename, [], [], []
+    document = parse_filename(filename)
+    metadatas = [{**document, **metadata} for metadata in metadatas]
+    return filename, chunks, metadatas, extract_weighted_triplets(text)
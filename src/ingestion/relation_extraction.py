@@ -1,17 +1,61 @@
 # src/ingestion/relation_extraction.py
-from transformers import pipeline
+from bisect import bisect_right
+from collections import Counter
+from itertools import combinations
+from config.settings import settings
+from src.utils.ner_utils import run_ner
+from src.utils.model_registry import get_ner_pipeline
+from src.utils.text_utils import SENTENCE_BOUNDARY
+from src.utils.entity_resolver import get_resolver
 
-nlp = pipeline("ner", model="dslim/bert-base-NER")
-relation_model = pipeline("text2text-generation", model="google/flan-t5-base")
+DEFAULT_PREDICATE = "sell"  # Simplify for now; a relation model could supply better predicates
+
+def sentence_starts(text):
+    """Start offsets of each sentence window in text."""
+    return [0] + [m.end() for m in SENTENCE_BOUNDARY.finditer(text)]
+
+def count_cooccurrence_triplets(text, entities, max_entities=None):
+    """
+    Pair entities that co-occur in the same sentence window.
+    Each entity is read from its span of the source text, since the NER
+    decoder respaces punctuation ("Coca - Cola"), then mapped to its
+    canonical name; fragments are dropped.
+
+    Args:
+        text (str): Source document text.
+        entities (list): NER results with document-level "start" and "end" keys.
+        max_entities (int): Cap on distinct entities paired per window.
+
+    Returns:
+        Counter: (subject, predicate, object) -> number of windows it occurred in.
+    """
+    max_entities = max_entities or settings.MAX_ENTITIES_PER_CHUNK
+    resolver = get_resolver()
+    starts = sentence_starts(text)
+
+    windows = {}
+    for ent in entities:
+        word = text[ent["start"]:ent["end"]].strip()
+        if not word:
+            continue
+        word = resolver.canonical(word)
+        if word is None:
+            continue
+        window = windows.setdefault(bisect_right(starts, ent["start"]) - 1, [])
+        if word not in window and len(window) < max_entities:
+            window.append(word)
+
+    counts = Counter()
+    for window in windows.values():
+        for subject, obj in combinations(window, 2):
+            counts[(subject, DEFAULT_PREDICATE, obj)] += 1
+    return counts
 
 def extract_triplets(text):
-    entities = nlp(text)
-    triplets = []
-    for i in range(len(entities) - 1):
-        subject = entities[i]['word']
-        for j in range(i + 1, len(entities)):
-            predicate = "sell"  # Simplify for now; use relation_model for better predicates
-            obj = entities[j]['word']
-            if subject.lower() in text.lower() and obj.lower() in text.lower():
-                triplets.append((subject, predicate, obj))
-    return triplets
\ No newline at end of file
+    """Return deduplicated (subject, predicate, object) triplets for text."""
+    return list(count_cooccurrence_triplets(text, run_ner(get_ner_pipeline(), text)))
+
+def extract_weighted_triplets(text):
+    """Return deduplicated (subject, predicate, object, count) triplets for text."""
+    counts = count_cooccurrence_triplets(text, run_ner(get_ner_pipeline(), text))
+    return [(s, p, o, count) for (s, p, o), count in counts.items()]
@@ -1,18 +1,17 @@
 import os
-from transformers import pipeline
 import fitz  # PyMuPDF
+from src.utils.ner_utils import run_ner
+from src.utils.model_registry import get_ner_pipeline
 
-# Initialize Hugging Face pipeline for NER
-ner_pipeline = pipeline("ner", model="dslim/bert-base-NER", grouped_entities=True)
+def iter_pdf_pages(file_path):
+    """Yield (page_number, text) for each page of a PDF, starting at page 1."""
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            yield page.number + 1, page.get_text()
 
 def extract_text_from_pdf(file_path):
     """Extract full text from a PDF file using PyMuPDF."""
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-    return text
+    return "".join(text for _, text in iter_pdf_pages(file_path))
 
 def basic_clean_ner_output(ner_results):
     """Clean grouped NER output by combining entity words."""
@@ -36,7 +35,7 @@ def extract_entities_from_pdf(pdf_path):
     text = extract_text_from_pdf(pdf_path)
 
     # Step 2: Apply NER model
-    ner_results = ner_pipeline(text)
+    ner_results = run_ner(get_ner_pipeline(), text)
 
     # Step 3: Clean output
     cleaned_entities = basic_clean_ner_output(ner_results)
@@ -0,0 +1,181 @@
+# src/storage/compact_store.py
+"""
+Compact dense index with int8 scalar quantization.
+
+Each ingested document writes a segment of full-precision embeddings;
+build() normalizes them, quantizes every dimension to int8 with a shared
+per-dimension scale and saves codes, scales and the float32 vectors as
+.npy files. Queries memory-map the arrays, scan the int8 codes block by
+block and re-score only the best candidates against the float32 vectors,
+so the resident index is about a quarter of the float32 size.
+"""
+
+import json
+import os
+import numpy as np
+from src.storage.segment_store import SegmentStore, MappedIndex
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+store = SegmentStore(settings.COMPACT_INDEX_DIR, ".npz", "ids.json")
+
+def write_segment(source, chunk_ids, embeddings):
+    """Record one document's embeddings; takes effect at the next build()."""
+    store.write(source, lambda f: np.savez(
+        f,
+        source=np.asarray(source),
+        ids=np.asarray(chunk_ids, dtype=str),
+        embeddings=np.asarray(embeddings, dtype=np.float32),
+    ))
+
+def remove_segment(source):
+    store.remove(source)
+
+def quantize(vectors):
+    """
+    Symmetric int8 quantization with one scale per dimension.
+
+    Returns:
+        tuple: (int8 codes, float32 scales) such that codes * scales ~= vectors.
+    """
+    scales = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+def backfill(indexed):
+    """
+    Write segments for documents stored in ChromaDB before the compact index
+    was enabled, from their stored embeddings; unchanged files are never
+    re-ingested, so they would otherwise be missing from dense search.
+
+    Args:
+        indexed (int): Number of chunks in the current segments; ChromaDB is
+            only scanned when it holds more.
+
+    Returns:
+        bool: True if any segment was written.
+    """
+    # vector_store writes segments through this module, so it can only be imported here
+    from src.storage.vector_store import collection
+    if collection.count() <= indexed:
+        return False
+    stored = collection.get(include=["metadatas"])
+    missing = {}
+    for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+        source = (metadata or {}).get("source")
+        if source is not None and not os.path.exists(store.path(source)):
+            missing.setdefault(source, []).append(chunk_id)
+    for source, ids in sorted(missing.items()):
+        found = collection.get(ids=ids, include=["embeddings"])
+        write_segment(source, found["ids"], found["embeddings"])
+    if missing:
+        logger.info(f"Backfilled compact segments for {len(missing)} documents from ChromaDB.")
+    return bool(missing)
+
+def build(fill_missing=True):
+    """
+    Compact all segments into normalized float32 vectors, their int8 codes and
+    chunk IDs, first backfilling documents that have no segment yet.
+    """
+    segments = store.state()
+    chunk_ids, blocks, sources = [], [], []
+    for name in segments:
+        with np.load(os.path.join(store.segment_dir, name)) as segment:
+            sources.append([str(segment["source"]), len(chunk_ids), len(chunk_ids) + len(segment["ids"])])
+            chunk_ids.extend(segment["ids"].tolist())
+            blocks.append(segment["embeddings"])
+    if fill_missing and backfill(len(chunk_ids)):
+        return build(fill_missing=False)
+    vectors = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    if len(vectors):
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    codes, scales = quantize(vectors)
+
+    arrays = {"codes.npy": codes, "scales.npy": scales, "vectors.npy": vectors}
+    store.publish(arrays, {"chunk_ids": chunk_ids, "sources": sources, "segments": segments})
+    logger.info(
+        f"Built compact index: {len(chunk_ids)} vectors, {codes.nbytes / 2**20:.1f} MiB codes "
+        f"vs {vectors.nbytes / 2**20:.1f} MiB float32."
+    )
+
+def build_if_stale():
+    """
+    Rebuild only if segments were added, changed or removed since the last
+    build, including segments backfilled for documents the index is missing.
+    """
+    try:
+        with open(os.path.join(store.index_dir, store.catalog)) as f:
+            indexed = len(json.load(f)["chunk_ids"])
+    except FileNotFoundError:
+        indexed = 0
+    backfill(indexed)
+    return store.build_if_stale(lambda: build(fill_missing=False))
+
+class CompactIndex(MappedIndex):
+    """Read side of the compact index, memory-mapped and reloaded when build() replaces it."""
+
+    catalog = store.catalog
+
+    def __init__(self, index_dir=None):
+        super().__init__(index_dir or settings.COMPACT_INDEX_DIR)
+
+    def _load(self, ids):
+        codes, vectors = self._array("codes.npy"), self._array("vectors.npy")
+        scales = self._array("scales.npy", mmap_mode=None)
+        if len(codes) != len(ids["chunk_ids"]) or vectors.shape != codes.shape or len(scales) != codes.shape[1]:
+            return False
+        self.codes, self.vectors, self.scales = codes, vectors, scales
+        return True
+
+    def search(self, query_embedding, top_k=10, sources=None, chunk_ids=None):
+        """
+        Cosine search: approximate int8 scores for every vector, exact float32
+        scores for the top_k * COMPACT_RESCORE_FACTOR candidates. Given a set
+        of source documents, only their row ranges (plus any extra chunk_ids)
+        are scanned.
+
+        Returns:
+            list: (chunk_id, score) pairs, best first.
+        """
+        if not self._reload_if_changed() or not self.chunk_ids:
+            return []
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) + 1e-12)
+        # Folding the scales into the query keeps the scan a plain int8 -> float32 matmul
+        scaled_q = q * self.scales
+        if sources is None:
+            ranges = [(0, len(self.chunk_ids))]
+        else:
+            ranges = [(start, end) for source, start, end in self.sources if source in sources and end > start]
+        extra = [
+            row for row in self.row_of(chunk_ids or ())
+            if not any(start <= row < end for start, end in ranges)
+        ]
+        if not ranges and not extra:
+            return []
+        rows, approx = [], []
+        block = settings.COMPACT_BLOCK_ROWS
+        for range_start, range_end in ranges:
+            for start in range(range_start, range_end, block):
+                end = min(start + block, range_end)
+                rows.append(np.arange(start, end))
+                approx.append(self.codes[start:end].astype(np.float32) @ scaled_q)
+        if extra:
+            extra = np.asarray(sorted(extra))
+            rows.append(extra)
+            approx.append(self.codes[extra].astype(np.float32) @ scaled_q)
+        rows, approx = np.concatenate(rows), np.concatenate(approx)
+
+        n_candidates = min(len(rows), top_k * settings.COMPACT_RESCORE_FACTOR)
+        candidates = np.sort(rows[np.argpartition(-approx, n_candidates - 1)[:n_candidates]])
+        exact = self.vectors[candidates] @ q
+        order = np.argsort(-exact)[:top_k]
+        return [(self.chunk_ids[candidates[i]], float(exact[i])) for i in order]
+
+compact_index = CompactIndex()
+
+if __name__ == "__main__":
+    build()
@@ -1,43 +1,182 @@
+import atexit
+import threading
+import time
+from itertools import islice
 from neo4j import GraphDatabase
 from config.settings import settings
+from src.utils.logger import get_logger
 
-# Initialize Neo4j driver
-driver = GraphDatabase.driver(
-    settings.NEO4J_URI,
-    auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD)
+logger = get_logger(__name__)
+
+# One pooled driver per process, created on first use and shared by every session.
+# Module state survives Streamlit reruns, so reruns reuse the pool instead of reconnecting.
+_driver = None
+_driver_lock = threading.Lock()
+
+def get_driver():
+    """Return the shared Neo4j driver, creating and verifying it on first use."""
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            driver = GraphDatabase.driver(
+                settings.NEO4J_URI,
+                auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+                max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+                connection_acquisition_timeout=settings.NEO4J_ACQUISITION_TIMEOUT,
+                max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+                max_transaction_retry_time=settings.NEO4J_MAX_RETRY_TIME,
+                keep_alive=True,
+            )
+            # Publish only a verified driver, so a failed connect is retried on the next call
+            try:
+                driver.verify_connectivity()
+            except Exception:
+                driver.close()
+                raise
+            _driver = driver
+            logger.info(f"Connected to Neo4j at {settings.NEO4J_URI}")
+        return _driver
+
+def close_driver():
+    """Close the shared driver; the next get_driver() call opens a new one."""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+atexit.register(close_driver)
+
+def read(query, **params):
+    """Run query in a managed read transaction (retried on transient errors) and return record dicts."""
+    with get_driver().session() as session:
+        return session.execute_read(lambda tx: [record.data() for record in tx.run(query, params)])
+
+def write(query, **params):
+    """Run query in a managed write transaction, retried on transient errors."""
+    with get_driver().session() as session:
+        return session.execute_write(lambda tx: tx.run(query, params).consume())
+
+# r.sources and r.source_weights are parallel lists: each source's share of r.weight is
+# replaced when that source is written again and subtracted when it is deleted.
+BULK_TRIPLET_QUERY = (
+    "UNWIND $rows AS row\n"
+    "MERGE (s:Entity {name: row.subject})\n"
+    "MERGE (o:Entity {name: row.object})\n"
+    "MERGE (s)-[r:RELATION {type: row.predicate}]->(o)\n"
+    "WITH r, row, coalesce(r.sources, []) AS sources\n"
+    "WITH r, row, sources, coalesce(r.source_weights, [x IN sources | 0]) AS weights,\n"
+    "     head([i IN range(0, size(sources) - 1) WHERE sources[i] = $source]) AS i\n"
+    "SET r.weight = coalesce(r.weight, 0) + row.weight - CASE WHEN i IS NULL THEN 0 ELSE weights[i] END\n"
+    "WITH r, row, sources, weights, i WHERE $source IS NOT NULL\n"
+    "SET r.sources = CASE WHEN i IS NULL THEN sources + $source ELSE sources END,\n"
+    "    r.source_weights = CASE WHEN i IS NULL THEN weights + row.weight\n"
+    "      ELSE [j IN range(0, size(weights) - 1) | CASE WHEN j = i THEN row.weight ELSE weights[j] END] END"
+)
+
+DELETE_SOURCE_QUERY = (
+    "MATCH (s:Entity)-[r:RELATION]->(o:Entity)\n"
+    "WHERE $source IN r.sources\n"
+    "WITH s, o, r, r.sources AS sources, coalesce(r.source_weights, [x IN r.sources | 0]) AS weights\n"
+    "WITH s, o, r, sources, weights, head([i IN range(0, size(sources) - 1) WHERE sources[i] = $source]) AS i\n"
+    "SET r.weight = coalesce(r.weight, 0) - weights[i],\n"
+    "    r.source_weights = [j IN range(0, size(weights) - 1) WHERE j <> i | weights[j]],\n"
+    "    r.sources = [j IN range(0, size(sources) - 1) WHERE j <> i | sources[j]]\n"
+    "WITH s, o, r WHERE size(r.sources) = 0\n"
+    "DELETE r\n"
+    "WITH collect(s) + collect(o) AS touched\n"
+    "UNWIND touched AS e\n"
+    "WITH DISTINCT e WHERE NOT (e)--()\n"
+    "DELETE e"
 )
 
+SCHEMA_QUERIES = [
+    # Uniqueness constraint; also the index behind MERGE (e:Entity {name: ...})
+    "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+    # Full-text indexes used by the query templates in src/agents/graph_query.py
+    "CREATE FULLTEXT INDEX entity_name_fulltext IF NOT EXISTS FOR (e:Entity) ON EACH [e.name]",
+    "CREATE FULLTEXT INDEX relation_type_fulltext IF NOT EXISTS FOR ()-[r:RELATION]-() ON EACH [r.type]",
+]
+
+_schema_ready = False
+
+def ensure_schema():
+    """Create the constraint and indexes the write and query paths rely on (once per process)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with get_driver().session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+    _schema_ready = True
+
 class GraphStore:
     def __init__(self):
-        self.driver = driver
+        self.driver = get_driver()
+        ensure_schema()
 
     def close(self):
-        self.driver.close()
+        close_driver()
 
     def create_triplet(self, subject, predicate, obj):
-        with self.driver.session() as session:
-            query = (
-                "MERGE (s:Entity {name: $subject})\n"
-                "MERGE (o:Entity {name: $object})\n"
-                "MERGE (s)-[:RELATION {type: $predicate}]->(o)"
-            )
-            session.run(query, subject=subject, predicate=predicate, object=obj)
+        query = (
+            "MERGE (s:Entity {name: $subject})\n"
+            "MERGE (o:Entity {name: $object})\n"
+            "MERGE (s)-[:RELATION {type: $predicate}]->(o)"
+        )
+        write(query, subject=subject, predicate=predicate, object=obj)
+
+    def create_triplets(self, triplets, batch_size=None, source=None):
+        """
+        Write (subject, predicate, object) triplets in UNWIND batches,
+        one write transaction per batch. Accepts any iterable, so triplets
+        can be streamed without materializing the full list. Triplets may carry
+        a fourth weight element (e.g. co-occurrence count, default 1) that is
+        added to the edge's weight. When source is given it is recorded on
+        each edge with its weight, so writing the source again replaces its
+        share instead of adding to it and delete_source subtracts it.
+
+        Returns:
+            int: Number of triplets written.
+        """
+        batch_size = batch_size or settings.GRAPH_BATCH_SIZE
+        iterator = iter(triplets)
+        total = 0
+        with get_driver().session() as session:
+            while True:
+                batch = [
+                    {"subject": t[0], "predicate": t[1], "object": t[2], "weight": t[3] if len(t) > 3 else 1}
+                    for t in islice(iterator, batch_size)
+                ]
+                if not batch:
+                    break
+                start = time.perf_counter()
+                session.execute_write(
+                    lambda tx, rows: tx.run(BULK_TRIPLET_QUERY, rows=rows, source=source).consume(), batch
+                )
+                elapsed = time.perf_counter() - start
+                total += len(batch)
+                logger.info(
+                    f"Wrote batch of {len(batch)} triplets in {elapsed:.2f}s "
+                    f"({len(batch) / max(elapsed, 1e-9):.0f} triplets/s, {total} total)"
+                )
+        return total
+
+    def delete_source(self, source):
+        """Detach source from its edges, deleting edges and entities left without any source."""
+        write(DELETE_SOURCE_QUERY, source=source)
 
     def query_triplets(self, query_term):
-        with self.driver.session() as session:
-            query = (
-                "MATCH (s:Entity)-[r:RELATION]->(o:Entity)\n"
-                "WHERE s.name CONTAINS $term OR r.type CONTAINS $term OR o.name CONTAINS $term\n"
-                "RETURN s.name AS subject, r.type AS predicate, o.name AS object"
-            )
-            result = session.run(query, term=query_term)
-            return [f"({r['subject']} --{r['predicate']}--> {r['object']})" for r in result]
+        query = (
+            "MATCH (s:Entity)-[r:RELATION]->(o:Entity)\n"
+            "WHERE s.name CONTAINS $term OR r.type CONTAINS $term OR o.name CONTAINS $term\n"
+            "RETURN s.name AS subject, r.type AS predicate, o.name AS object"
+        )
+        return [f"({r['subject']} --{r['predicate']}--> {r['object']})" for r in read(query, term=query_term)]
 
 # For internal module usage
-def query_triplets(cypher_query: str):
-    with driver.session() as session:
-        result = session.run(cypher_query)
-        return [record.data() for record in result]
+def query_triplets(cypher_query: str, **params):
+    return read(cypher_query, **params)
 
 # === Example run (manual testing) ===
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+# src/storage/segment_store.py
+"""
+Shared machinery of the indexes built from per-document segments.
+
+Ingestion writes one segment file per document; build() compacts all
+segments into arrays that queries memory-map. The arrays are published
+first and a JSON catalog (chunk IDs, per-source row ranges and the segment
+state they were built from) last, so readers reload only once a complete
+generation is on disk.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+def replace_file(path, write):
+    """Write to a temporary file and swap it in, so readers' memory maps keep the old inode."""
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+    os.replace(path + ".tmp", path)
+
+class SegmentStore:
+    """Segment files of one index, kept under index_dir/segments and named by source hash."""
+
+    def __init__(self, index_dir, suffix, catalog):
+        self.index_dir = index_dir
+        self.segment_dir = os.path.join(index_dir, "segments")
+        self.suffix = suffix
+        self.catalog = catalog
+
+    def path(self, source):
+        return os.path.join(self.segment_dir, hashlib.sha1(source.encode("utf-8")).hexdigest()[:16] + self.suffix)
+
+    def write(self, source, write):
+        """Write one document's segment atomically; takes effect at the next build."""
+        os.makedirs(self.segment_dir, exist_ok=True)
+        replace_file(self.path(source), write)
+
+    def remove(self, source):
+        try:
+            os.remove(self.path(source))
+        except FileNotFoundError:
+            pass
+
+    def state(self):
+        """Segment file names and modification times, recorded at build time to detect staleness."""
+        if not os.path.isdir(self.segment_dir):
+            return {}
+        return {
+            name: os.stat(os.path.join(self.segment_dir, name)).st_mtime_ns
+            for name in sorted(os.listdir(self.segment_dir)) if name.endswith(self.suffix)
+        }
+
+    def publish(self, arrays, catalog):
+        """Write the built arrays ({file name: array}), then the catalog that makes them visible."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        for name, array in arrays.items():
+            replace_file(os.path.join(self.index_dir, name), lambda f: np.save(f, array))
+        # The catalog goes last: readers reload when it changes, by which time every array is in place
+        data = json.dumps(catalog).encode("utf-8")
+        replace_file(os.path.join(self.index_dir, self.catalog), lambda f: f.write(data))
+
+    def build_if_stale(self, build):
+        """Run build() only if segments were added, changed or removed since the last build."""
+        try:
+            with open(os.path.join(self.index_dir, self.catalog)) as f:
+                built = json.load(f).get("segments")
+        except FileNotFoundError:
+            built = None
+        if built == self.state():
+            return False
+        build()
+        return True
+
+class MappedIndex:
+    """
+    Read side of a segment-built index, reloaded when build() publishes a
+    new catalog. Subclasses set catalog and implement _load().
+    """
+
+    catalog = None
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    def _array(self, name, mmap_mode="r"):
+        return np.load(os.path.join(self.index_dir, name), mmap_mode=mmap_mode)
+
+    def _load(self, catalog):
+        """Load the arrays described by catalog; return False if they do not match it."""
+        raise NotImplementedError
+
+    def _reload_if_changed(self):
+        catalog_path = os.path.join(self.index_dir, self.catalog)
+        try:
+            mtime = os.stat(catalog_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                with open(catalog_path) as f:
+                    catalog = json.load(f)
+                # A build running concurrently may have replaced only some arrays; keep the
+                # previous generation until the files agree with the catalog again
+                if not self._load(catalog):
+                    return self._loaded_mtime is not None
+                self.chunk_ids = catalog["chunk_ids"]
+                self.sources = catalog.get("sources", [])
+                self.rows = None
+                self._loaded_mtime = mtime
+        return True
+
+    def row_of(self, chunk_ids):
+        """Row numbers of the given chunk IDs that are in the index."""
+        if self.rows is None:
+            self.rows = {chunk_id: i for i, chunk_id in enumerate(self.chunk_ids)}
+        return [self.rows[c] for c in chunk_ids if c in self.rows]
@@ -0,0 +1,153 @@
+# src/storage/sparse_index.py
+"""
+BM25 lexical index over stored chunks.
+
+Each ingested document writes a small term-frequency segment; build()
+compacts all segments into CSR postings arrays (.npy) that queries
+memory-map, so exact tickers, form numbers and line-item names can be
+matched without loading the index into memory.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+import numpy as np
+from src.storage.segment_store import SegmentStore, MappedIndex
+from src.utils.logger import get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+K1 = 1.2
+B = 0.75
+TOKEN_PATTERN = re.compile(r"[a-z0-9](?:[a-z0-9.\-]*[a-z0-9])?")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "were", "with", "what", "which", "who",
+}
+
+def tokenize(text):
+    """Lower-cased terms; keeps tokens like "10-k", "1a" and "u.s." intact."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+store = SegmentStore(settings.SPARSE_INDEX_DIR, ".json", "vocab.json")
+
+def write_segment(source, chunk_ids, texts):
+    """Record term frequencies for one document's chunks; takes effect at the next build()."""
+    docs = []
+    for chunk_id, text in zip(chunk_ids, texts):
+        terms = tokenize(text)
+        docs.append({"id": chunk_id, "length": len(terms), "tf": Counter(terms)})
+    data = json.dumps({"source": source, "docs": docs}).encode("utf-8")
+    store.write(source, lambda f: f.write(data))
+
+def remove_segment(source):
+    store.remove(source)
+
+def build():
+    """Compact all segments into memory-mappable CSR arrays plus vocabulary and chunk ID lists."""
+    segments = store.state()
+    chunk_ids, lengths, postings, sources = [], [], {}, []
+    if segments:
+        for name in segments:
+            with open(os.path.join(store.segment_dir, name)) as f:
+                segment = json.load(f)
+            sources.append([segment["source"], len(chunk_ids), len(chunk_ids) + len(segment["docs"])])
+            for doc in segment["docs"]:
+                doc_index = len(chunk_ids)
+                chunk_ids.append(doc["id"])
+                lengths.append(doc["length"])
+                for term, tf in doc["tf"].items():
+                    postings.setdefault(term, []).append((doc_index, tf))
+
+    vocab = sorted(postings)
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    for i, term in enumerate(vocab):
+        offsets[i + 1] = offsets[i] + len(postings[term])
+    doc_indices = np.empty(offsets[-1], dtype=np.int32)
+    term_freqs = np.empty(offsets[-1], dtype=np.uint16)
+    for i, term in enumerate(vocab):
+        entries = np.asarray(postings[term], dtype=np.int64).reshape(-1, 2)
+        doc_indices[offsets[i]:offsets[i + 1]] = entries[:, 0]
+        term_freqs[offsets[i]:offsets[i + 1]] = np.minimum(entries[:, 1], np.iinfo(np.uint16).max)
+
+    arrays = {
+        "offsets.npy": offsets,
+        "doc_indices.npy": doc_indices,
+        "term_freqs.npy": term_freqs,
+        "lengths.npy": np.asarray(lengths, dtype=np.int32),
+    }
+    store.publish(arrays, {"terms": vocab, "chunk_ids": chunk_ids, "sources": sources, "segments": segments})
+    logger.info(f"Built BM25 index: {len(chunk_ids)} chunks, {len(vocab)} terms, {offsets[-1]} postings.")
+
+def build_if_stale():
+    """Rebuild only if segments were added, changed or removed since the last build."""
+    return store.build_if_stale(build)
+
+class SparseIndex(MappedIndex):
+    """Read side of the BM25 index, memory-mapped and reloaded when build() replaces it."""
+
+    catalog = store.catalog
+
+    def __init__(self, index_dir=None):
+        super().__init__(index_dir or settings.SPARSE_INDEX_DIR)
+
+    def _load(self, vocab):
+        offsets, lengths = self._array("offsets.npy"), self._array("lengths.npy")
+        doc_indices, term_freqs = self._array("doc_indices.npy"), self._array("term_freqs.npy")
+        if (
+            len(offsets) != len(vocab["terms"]) + 1 or len(lengths) != len(vocab["chunk_ids"])
+            or len(doc_indices) != offsets[-1] or len(term_freqs) != offsets[-1]
+        ):
+            return False
+        self.offsets, self.lengths = offsets, lengths
+        self.doc_indices, self.term_freqs = doc_indices, term_freqs
+        self.term_ids = {term: i for i, term in enumerate(vocab["terms"])}
+        self.avg_length = float(np.mean(lengths)) if len(lengths) else 0.0
+        return True
+
+    def search(self, query, top_k=10, sources=None, chunk_ids=None):
+        """
+        BM25 search, restricted to the chunks of the given source documents
+        (plus any extra chunk_ids) when sources is not None.
+
+        Returns:
+            list: (chunk_id, score) pairs, best first.
+        """
+        if not self._reload_if_changed() or not self.chunk_ids:
+            return []
+        n_docs = len(self.chunk_ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_indices[start:end]
+            tf = self.term_freqs[start:end].astype(np.float32)
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = K1 * (1 - B + B * self.lengths[docs] / max(self.avg_length, 1e-9))
+            scores[docs] += idf * tf * (K1 + 1) / (tf + norm)
+        if sources is not None:
+            allowed = np.zeros(n_docs, dtype=bool)
+            for source, start, end in self.sources:
+                if source in sources:
+                    allowed[start:end] = True
+            allowed[self.row_of(chunk_ids or ())] = True
+            scores[~allowed] = 0
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        best = hits[np.argsort(-scores[hits])[:top_k]]
+        return [(self.chunk_ids[i], float(scores[i])) for i in best]
+
+sparse_index = SparseIndex()
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -1,9 +1,17 @@
+import os
+import time
+import numpy as np
 import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from src.utils.model_registry import get_embedding_function, encode_texts
+from src.storage import sparse_index, compact_store
+from src.utils.doc_metadata import duplicate_flag
+from src.utils.logger import get_logger
 from config.settings import settings
 
+logger = get_logger(__name__)
+
 # Define proper embedding function object
-embedding_function = SentenceTransformerEmbeddingFunction(model_name=settings.EMBEDDING_MODEL)
+embedding_function = get_embedding_function()
 
 client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIRECTORY)
 
@@ -12,13 +20,75 @@ collection = client.get_or_create_collection(
     embedding_function=embedding_function
 )
 
+# Touched on every write so query caches in any process can detect index changes
+VERSION_FILE = os.path.join(settings.CHROMA_PERSIST_DIRECTORY, "collection.version")
+
+def collection_version():
+    """Opaque version of the collection contents; changes whenever chunks are written or deleted."""
+    try:
+        return os.stat(VERSION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def bump_collection_version():
+    os.makedirs(settings.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
+    with open(VERSION_FILE, "w") as f:
+        f.write(str(time.time_ns()))
+
 # Store chunks function
-def store_text_chunks(chunks, source_doc):
-    for i, chunk in enumerate(chunks):
-        chunk_id = f"{source_doc}_{i}"
-        collection.add(
-            documents=[chunk],
-            ids=[chunk_id],
-            metadatas=[{"source": source_doc}]
+def store_text_chunks(chunks, source_doc, batch_size=None, metadatas=None, chunk_ids=None):
+    """
+    Embed and upsert chunks in batches, one encode pass and one upsert per batch.
+    Optional per-chunk metadatas (e.g. page ranges) are stored alongside the source,
+    and explicit chunk_ids override the default "<source_doc>_<i>" IDs.
+
+    Returns:
+        list: IDs of the stored chunks.
+    """
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+    chunk_ids = list(chunk_ids) if chunk_ids is not None else [f"{source_doc}_{i}" for i in range(len(chunks))]
+    metadatas = [{"source": source_doc, **(m or {})} for m in (metadatas or [None] * len(chunks))]
+    start = time.perf_counter()
+    stored = []
+    for offset in range(0, len(chunks), batch_size):
+        batch = chunks[offset:offset + batch_size]
+        embeddings = encode_texts(batch, batch_size=batch_size)
+        stored.append(embeddings)
+        collection.upsert(
+            documents=batch,
+            embeddings=embeddings.tolist(),
+            ids=chunk_ids[offset:offset + batch_size],
+            metadatas=metadatas[offset:offset + batch_size]
         )
+    elapsed = time.perf_counter() - start
+    logger.info(f"Embedded {len(chunks)} chunks in {elapsed:.2f}s ({len(chunks) / max(elapsed, 1e-9):.1f} chunks/s)")
+    sparse_index.write_segment(source_doc, chunk_ids, chunks)
+    if stored and settings.COMPACT_VECTOR_STORE:
+        compact_store.write_segment(source_doc, chunk_ids, np.concatenate(stored))
+    bump_collection_version()
     print(f"Stored {len(chunks)} chunks from {source_doc} in ChromaDB.")
+    return chunk_ids
+
+def link_duplicates(source_doc, original_ids, linked=True):
+    """
+    Flag stored chunks whose copies in source_doc were skipped as duplicates,
+    so metadata-filtered search scoped to source_doc still reaches them.
+    linked=False clears the flag when source_doc is removed.
+    """
+    original_ids = sorted(set(original_ids))
+    if not original_ids:
+        return
+    existing = collection.get(ids=original_ids, include=["metadatas"])
+    if existing["ids"]:
+        flag = duplicate_flag(source_doc)
+        collection.update(
+            ids=existing["ids"],
+            metadatas=[{**(metadata or {}), flag: linked} for metadata in existing["metadatas"]],
+        )
+        bump_collection_version()
+
+def delete_chunks(chunk_ids):
+    """Remove previously stored chunks by ID."""
+    if chunk_ids:
+        collection.delete(ids=list(chunk_ids))
+        bump_collection_version()
@@ -0,0 +1,104 @@
+"""
+Structured document metadata (company, form type, fiscal year) parsed from
+filenames such as "AnnualReport_Amazon_24_form_10-K.pdf", and the filters
+built from it for metadata-scoped retrieval.
+"""
+
+import hashlib
+import os
+import re
+
+# SEC form types by their letters-and-digits spelling, e.g. "10k" -> "10-K"
+FORMS = {
+    re.sub(r"[^0-9a-z]", "", form.lower()): form
+    for form in ("10-K", "10-Q", "8-K", "11-K", "6-K", "20-F", "S-1", "DEF 14A")
+}
+FORM_PATTERN = re.compile(
+    r"(?<![a-z0-9])("
+    + "|".join(r"[-\s]?".join(re.escape(part) for part in re.split(r"[-\s]", form.lower())) for form in FORMS.values())
+    + r")(?![a-z0-9])",
+    re.IGNORECASE,
+)
+YEAR_PATTERN = re.compile(r"(?<![0-9])(?:(?:19|20)\d{2})(?![0-9])")
+FISCAL_YEAR_PATTERN = re.compile(r"\bfy\s?'?(\d{2}|\d{4})\b", re.IGNORECASE)
+# Filename words that describe the document rather than name the company
+GENERIC_WORDS = {
+    "annualreport", "annual", "quarterlyreport", "quarterly", "report", "form", "filing", "sec",
+    "q1", "q2", "q3", "q4",
+}
+# A word of a company name: letters with digits or punctuation, e.g. "3m", "coca-cola", "at&t"
+COMPANY_WORD = re.compile(r"[a-z0-9&'.\-]*[a-z][a-z0-9&'.\-]*")
+
+FILTER_FIELDS = ("company", "form", "year")
+
+def normalize_form(text):
+    """Canonical spelling of a form type ("form 10k" -> "10-K"), or None if unknown."""
+    return FORMS.get(re.sub(r"[^0-9a-z]", "", text.lower()).removeprefix("form"))
+
+def normalize_year(text):
+    """Four-digit year from "2024", "24" or "FY24"."""
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+def parse_filename(filename):
+    """
+    Company, form type and fiscal year encoded in a filing's filename.
+
+    The company is the first run of name words, ended by the year, the form
+    type or a generic word, so "Coca_Cola_2024_10-K" gives "coca cola".
+
+    Returns:
+        dict: Any of "company" (lower-case), "form" and "year" (int) that could be parsed.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    metadata = {}
+    tokens = re.split(r"[_\s]+", stem)
+    form = FORM_PATTERN.search(stem)
+    if form:
+        metadata["form"] = normalize_form(form.group(1))
+        # None marks where the form was, so it ends a company name like a year does
+        tokens = re.split(r"[_\s]+", stem[:form.start()]) + [None] + re.split(r"[_\s]+", stem[form.end():])
+    company, company_done = [], False
+    for token in tokens:
+        if token == "":
+            continue
+        year = re.fullmatch(r"(?:fy)?(\d{2}|(?:19|20)\d{2})", token, re.IGNORECASE) if token else None
+        if year and "year" not in metadata:
+            metadata["year"] = normalize_year(year.group(1))
+        if token and not year and COMPANY_WORD.fullmatch(token.lower()) and token.lower() not in GENERIC_WORDS:
+            if not company_done:
+                company.append(token.lower())
+        elif company:
+            company_done = True
+    if company:
+        metadata["company"] = " ".join(company)
+    return metadata
+
+def query_years(query):
+    """Fiscal years mentioned in a question ("2024", "FY24", "FY 2024")."""
+    years = {int(y) for y in YEAR_PATTERN.findall(query)}
+    return years | {normalize_year(y) for y in FISCAL_YEAR_PATTERN.findall(query)}
+
+def matches(metadata, filters):
+    """True if metadata satisfies every field of filters ({field: [allowed values]})."""
+    return all(metadata.get(field) in allowed for field, allowed in filters.items())
+
+def duplicate_flag(source):
+    """Metadata key set on a stored chunk when source repeats it (its own copy was skipped)."""
+    return "dup_" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+def chroma_where(sources, linked_sources=()):
+    """
+    ChromaDB where clause restricting search to the chunks of sources, or
+    None when the search is unscoped. Chunks flagged as repeated by one of
+    linked_sources match as well.
+
+    Documents are selected by filename rather than by stored metadata, so
+    the scope always follows the current parse_filename rules.
+    """
+    if not sources:
+        return None
+    sources = sorted(sources)
+    where = {"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}}
+    flags = [{duplicate_flag(source): True} for source in sorted(linked_sources)]
+    return {"$or": [where, *flags]} if flags else where
@@ -0,0 +1,159 @@
+"""
+Persistent content-addressed cache of text embeddings.
+
+Embeddings are keyed by (model name, SHA-1 of the text) and stored in
+append-only NumPy shards, one directory per model. Each shard is a pair
+of .npy files (keys and float32 vectors); vectors are memory-mapped so a
+large cache costs little resident memory. New embeddings are buffered and
+written as a new shard once EMBEDDING_CACHE_SHARD_ROWS accumulate, on
+flush() or at interpreter exit.
+"""
+
+import atexit
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from config.settings import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+class EmbeddingCache:
+    """Embeddings of one model, looked up by text hash before the model is run."""
+
+    def __init__(self, model_name, cache_dir=None):
+        self.model_name = model_name
+        model_dir = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir or settings.EMBEDDING_CACHE_DIR, model_dir)
+        self._index = {}
+        self._shards = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._refresh()
+
+    def _refresh(self):
+        """Index shards written since the last refresh, including by other processes."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in sorted(names):
+            if not name.endswith(".keys.npy"):
+                continue
+            shard = name[:-len(".keys.npy")]
+            if shard in self._shards:
+                continue
+            keys = np.load(os.path.join(self.cache_dir, name))
+            self._shards[shard] = np.load(os.path.join(self.cache_dir, shard + ".vectors.npy"), mmap_mode="r")
+            for row, key in enumerate(keys):
+                self._index[key.tobytes()] = (shard, row)
+
+    def _lookup(self, key):
+        if key in self._pending:
+            return self._pending[key]
+        location = self._index.get(key)
+        if location is None:
+            return None
+        shard, row = location
+        return np.array(self._shards[shard][row])
+
+    def get_many(self, texts):
+        """Cached embeddings for texts, with None where the text has not been embedded yet."""
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            found = [self._lookup(key) for key in keys]
+            if any(vector is None for vector in found):
+                self._refresh()
+                found = [vector if vector is not None else self._lookup(key) for key, vector in zip(keys, found)]
+            misses = sum(vector is None for vector in found)
+            self.hits += len(found) - misses
+            self.misses += misses
+        return found
+
+    def put_many(self, texts, vectors):
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                self._pending[text_key(text)] = np.asarray(vector, dtype=np.float32)
+            full = len(self._pending) >= settings.EMBEDDING_CACHE_SHARD_ROWS
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered embeddings as a new shard."""
+        with self._lock:
+            if not self._pending:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            shard = f"{time.time_ns()}_{os.getpid()}"
+            keys = np.frombuffer(b"".join(self._pending), dtype=np.uint8).reshape(-1, 20)
+            vectors = np.stack(list(self._pending.values()))
+            # Vectors first, so a reader never sees keys without their vectors
+            for suffix, array in ((".vectors.npy", vectors), (".keys.npy", keys)):
+                path = os.path.join(self.cache_dir, shard + suffix)
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, array)
+                os.replace(path + ".tmp", path)
+            self._shards[shard] = np.load(os.path.join(self.cache_dir, shard + ".vectors.npy"), mmap_mode="r")
+            for row, key in enumerate(self._pending):
+                self._index[key] = (shard, row)
+            self._pending.clear()
+        logger.info(f"Wrote {len(keys)} embeddings to cache shard {shard}")
+
+    def encode(self, texts, encoder):
+        """
+        Embeddings for texts, running encoder only on texts missing from the cache.
+
+        Args:
+            texts (list): Texts to embed.
+            encoder (callable): Maps a list of texts to a 2-D array of embeddings.
+
+        Returns:
+            np.ndarray: One float32 row per text.
+        """
+        texts = list(texts)
+        found = self.get_many(texts)
+        missing = [i for i, vector in enumerate(found) if vector is None]
+        if missing:
+            # Identical texts in one call are embedded once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique, np.asarray(encoder(unique), dtype=np.float32)))
+            self.put_many(unique, computed.values())
+            for i in missing:
+                found[i] = computed[texts[i]]
+        return np.stack(found) if found else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self):
+        """Hits, misses, hit rate and number of cached embeddings."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._index) + len(self._pending),
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model_name=None):
+    """Process-wide cache for model_name, or None when EMBEDDING_CACHE is disabled."""
+    if not settings.EMBEDDING_CACHE:
+        return None
+    model_name = model_name or settings.EMBEDDING_MODEL
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name)
+        return _caches[model_name]
+
+def flush_all():
+    for cache in list(_caches.values()):
+        cache.flush()
+
+atexit.register(flush_all)
@@ -1,7 +1,4 @@
-from sentence_transformers import SentenceTransformer
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from src.utils.model_registry import encode_texts
 
 def get_embedding(text):
-    return model.encode(text, convert_to_numpy=True)
-
+    return encode_texts([text])[0]
@@ -0,0 +1,115 @@
+"""
+Entity name normalization and alias resolution.
+Maps surface forms such as "Amazon.com, Inc." and "AMAZON" to one canonical
+graph node name, and rejects WordPiece fragments such as "##zon".
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from config.settings import settings
+
+# Corporate suffixes that do not distinguish entities ("Amazon.com, Inc." -> "Amazon")
+CORPORATE_SUFFIX = re.compile(
+    r"(?:,?\s+(?:inc|incorporated|corp|corporation|co|company|ltd|limited|llc|plc|lp|l\.p|n\.v|s\.a|ag|holdings)\.?"
+    r"|\.com)$",
+    re.IGNORECASE,
+)
+EDGE_PUNCTUATION = " \t\n.,;:'\"()[]{}-"
+
+def surface_form(name):
+    """Clean a raw entity string: merge subword pieces, collapse spaces and drop corporate suffixes."""
+    name = " ".join(name.replace(" ##", "").replace("##", "").split()).strip(EDGE_PUNCTUATION)
+    while True:
+        stripped = CORPORATE_SUFFIX.sub("", name).strip(EDGE_PUNCTUATION)
+        if stripped == name or not stripped:
+            return name
+        name = stripped
+
+def entity_key(name):
+    """Case- and punctuation-insensitive lookup key for an entity name."""
+    key = surface_form(name).lower()
+    return key[4:] if key.startswith("the ") else key
+
+class EntityResolver:
+    """
+    Hash index from entity keys to canonical names, plus explicit aliases.
+
+    The first surface form seen for a key becomes its canonical name; later
+    variants resolve to it. Snapshots persist the index for warm starts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.ENTITY_SNAPSHOT_PATH
+        self.canonical_names = {}
+        self.aliases = {}
+        self._lock = threading.Lock()
+
+    def canonical(self, name):
+        """Canonical name for name, registering it if unseen; None for fragments and noise."""
+        if name.lstrip().startswith("##"):
+            return None
+        key = entity_key(name)
+        if len(key) < 2:
+            return None
+        key = self.aliases.get(key, key)
+        with self._lock:
+            return self.canonical_names.setdefault(key, surface_form(name))
+
+    def lookup(self, name):
+        """Canonical name for name if it is already known, without registering it."""
+        key = entity_key(name)
+        return self.canonical_names.get(self.aliases.get(key, key))
+
+    def add_alias(self, alias, name):
+        """Make alias resolve to the same canonical name as name."""
+        canonical = self.canonical(name)
+        self.aliases[entity_key(alias)] = entity_key(canonical)
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            self.canonical_names = snapshot.get("canonical_names", {})
+            self.aliases = snapshot.get("aliases", {})
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            snapshot = {"canonical_names": self.canonical_names, "aliases": self.aliases}
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver():
+    """Process-wide resolver, warm-started from the last snapshot."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = EntityResolver().load()
+        return _resolver
+
+def canonicalize_triplets(triplets, resolver=None):
+    """
+    Map triplet subjects and objects to canonical names.
+
+    Triplets that collapse onto the same (subject, predicate, object) have
+    their weights summed; self-loops and unresolvable names are dropped.
+
+    Returns:
+        list: (subject, predicate, object, weight) tuples.
+    """
+    resolver = resolver or get_resolver()
+    weights = Counter()
+    for t in triplets:
+        subject, obj = resolver.canonical(t[0]), resolver.canonical(t[2])
+        if subject and obj and subject != obj:
+            weights[(subject, t[1], obj)] += t[3] if len(t) > 3 else 1
+    return [(s, p, o, weight) for (s, p, o), weight in weights.items()]
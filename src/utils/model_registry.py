@@ -0,0 +1,106 @@
+"""
+Process-wide registry for transformer and embedding models.
+Models are loaded lazily on first use and shared by every module that asks for them.
+"""
+
+import gc
+import os
+import threading
+from config.settings import settings
+from src.utils.embedding_cache import get_embedding_cache
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_models = {}
+_lock = threading.Lock()
+
+def get_model(key, loader):
+    """Return the model registered under key, calling loader() only the first time."""
+    with _lock:
+        if key not in _models:
+            logger.info(f"Loading model {key}")
+            _models[key] = loader()
+        return _models[key]
+
+def evict(key=None):
+    """Drop one model (or all of them when key is None) so its memory can be reclaimed."""
+    with _lock:
+        if key is None:
+            _models.clear()
+        else:
+            _models.pop(key, None)
+    gc.collect()
+
+def loaded_models():
+    """Keys of the models currently held in memory."""
+    return list(_models)
+
+def get_ner_pipeline(model_name=None):
+    """Shared Hugging Face NER pipeline with simple entity aggregation."""
+    model_name = model_name or settings.NER_MODEL
+
+    def load():
+        from transformers import pipeline
+        return pipeline("ner", model=model_name, aggregation_strategy="simple")
+
+    return get_model(("ner", model_name), load)
+
+def get_sentence_transformer(model_name=None):
+    """Shared SentenceTransformer instance."""
+    model_name = model_name or settings.EMBEDDING_MODEL
+
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    return get_model(("sentence_transformer", model_name), load)
+
+def get_embedding_tokenizer(model_name=None):
+    """
+    Tokenizer of the embedding model, used to size chunks in model tokens.
+    Loaded on its own so ingestion workers do not hold a copy of the model;
+    reuses the model's tokenizer when the model is already loaded here.
+    """
+    model_name = model_name or settings.EMBEDDING_MODEL
+    loaded = _models.get(("sentence_transformer", model_name))
+    if loaded is not None:
+        return loaded.tokenizer
+
+    def load():
+        from transformers import AutoTokenizer
+        # SentenceTransformer resolves bare names inside the sentence-transformers organization
+        repo = model_name if "/" in model_name or os.path.isdir(model_name) else f"sentence-transformers/{model_name}"
+        return AutoTokenizer.from_pretrained(repo)
+
+    return get_model(("tokenizer", model_name), load)
+
+def encode_texts(texts, model_name=None, batch_size=None):
+    """
+    Embed texts with the shared SentenceTransformer, reusing embeddings from
+    the persistent cache; the model is only loaded if some text is missing.
+
+    Returns:
+        np.ndarray: One embedding per text.
+    """
+    model_name = model_name or settings.EMBEDDING_MODEL
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+
+    def encode(batch):
+        return get_sentence_transformer(model_name).encode(batch, batch_size=batch_size, convert_to_numpy=True)
+
+    cache = get_embedding_cache(model_name)
+    return cache.encode(texts, encode) if cache is not None else encode(list(texts))
+
+class SharedEmbeddingFunction:
+    """ChromaDB embedding function backed by the shared SentenceTransformer."""
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+
+    def __call__(self, input):
+        return encode_texts(input, self.model_name).tolist()
+
+def get_embedding_function(model_name=None):
+    """Embedding function for ChromaDB collections; the model loads on first call."""
+    return SharedEmbeddingFunction(model_name)
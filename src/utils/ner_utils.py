@@ -1,6 +1,9 @@
-def clean_ner_output(ner_results):
+from config.settings import settings
+
+def clean_ner_output(ner_results, resolver=None):
     """
     Cleans and merges entity tokens into meaningful entity strings.
+    With an EntityResolver, merged words are mapped to canonical names and noise is dropped.
     """
     cleaned = []
     temp = {}
@@ -15,4 +18,74 @@ def clean_ner_output(ner_results):
             temp = {"word": word, "entity_group": entity_type}
     if temp:
         cleaned.append(temp)
+    if resolver is not None:
+        resolved = []
+        for ent in cleaned:
+            word = resolver.canonical(ent["word"])
+            if word:
+                resolved.append({"word": word, "entity_group": ent["entity_group"]})
+        cleaned = resolved
     return cleaned
+
+def token_windows(tokenizer, text, max_tokens, stride):
+    """
+    Yield (start, end) character spans covering text in windows of at most
+    max_tokens tokens, with consecutive windows sharing stride tokens.
+    """
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    step = max(max_tokens - stride, 1)
+    for i in range(0, len(offsets), step):
+        window = offsets[i:i + max_tokens]
+        yield window[0][0], window[-1][1]
+        if i + max_tokens >= len(offsets):
+            break
+
+def merge_window_entities(entities):
+    """Drop duplicates produced by overlapping windows, keeping the higher-scoring span."""
+    merged = []
+    for ent in sorted(entities, key=lambda e: (e["start"], -e["end"])):
+        if merged and ent["start"] < merged[-1]["end"]:
+            if ent.get("score", 0) > merged[-1].get("score", 0):
+                merged[-1] = ent
+            continue
+        merged.append(ent)
+    return merged
+
+def run_ner(ner_pipeline, text, max_tokens=None, stride=None, batch_size=None):
+    """
+    Run a Hugging Face NER pipeline over text of any length.
+
+    The text is split into token-bounded windows with stride overlap, the
+    windows are fed to the pipeline in batches, and entity offsets are mapped
+    back to document coordinates before duplicates across window boundaries
+    are merged.
+
+    Args:
+        ner_pipeline: A transformers "ner" pipeline.
+        text (str): Document text.
+        max_tokens (int): Tokens per window (defaults to settings.NER_WINDOW_TOKENS).
+        stride (int): Tokens shared by adjacent windows (defaults to settings.NER_WINDOW_STRIDE).
+        batch_size (int): Windows per forward pass (defaults to settings.NER_BATCH_SIZE).
+
+    Returns:
+        list: Entities in document order with document-level "start"/"end".
+    """
+    max_tokens = max_tokens or settings.NER_WINDOW_TOKENS
+    stride = settings.NER_WINDOW_STRIDE if stride is None else stride
+    batch_size = batch_size or settings.NER_BATCH_SIZE
+
+    spans = list(token_windows(ner_pipeline.tokenizer, text, max_tokens, stride))
+    if not spans:
+        return []
+    outputs = ner_pipeline([text[start:end] for start, end in spans], batch_size=batch_size)
+
+    entities = []
+    for (offset, _), window_entities in zip(spans, outputs):
+        for ent in window_entities:
+            ent = dict(ent)
+            ent["start"] += offset
+            ent["end"] += offset
+            entities.append(ent)
+    return merge_window_entities(entities)
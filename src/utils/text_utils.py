@@ -1,7 +1,136 @@
 # src/utils/text_utils.py
+import re
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+# 10-K/10-Q section headings such as "PART II" or "Item 1A." at the start of a line
+SECTION_HEADING = re.compile(r"^[ \t]*(?:PART\s+[IVX]+\b|Item\s+\d+[A-Z]?\.)", re.MULTILINE | re.IGNORECASE)
+
 def split_text(text, chunk_size=1000, chunk_overlap=200):
     chunks = []
     for i in range(0, len(text), chunk_size - chunk_overlap):
         chunk = text[i:i + chunk_size]
         chunks.append(chunk)
-    return chunks
\ No newline at end of file
+    return chunks
+
+def split_pages(pages, chunk_size=1000, chunk_overlap=200):
+    """
+    Lazily chunk a stream of (page_number, text) pages.
+
+    Produces the same chunks as split_text over the concatenated pages, but
+    only buffers the text not yet covered by an emitted chunk.
+
+    Yields:
+        tuple: (chunk, first_page, last_page)
+    """
+    step = chunk_size - chunk_overlap
+    page_starts, page_numbers = [], []
+    buffer, buffer_start, next_start, total = "", 0, 0, 0
+
+    def emit(start):
+        chunk = buffer[start - buffer_start:start - buffer_start + chunk_size]
+        first = page_numbers[bisect_right(page_starts, start) - 1]
+        last = page_numbers[bisect_right(page_starts, start + len(chunk) - 1) - 1]
+        return chunk, first, last
+
+    for page_number, text in pages:
+        if not text:
+            continue
+        page_starts.append(total)
+        page_numbers.append(page_number)
+        buffer += text
+        total += len(text)
+        while next_start + chunk_size <= total:
+            yield emit(next_start)
+            next_start += step
+        buffer, buffer_start = buffer[next_start - buffer_start:], next_start
+    while next_start < total:
+        yield emit(next_start)
+        next_start += step
+
+def sentence_spans(text, start=0, end=None):
+    """Yield (start, end) spans of the non-blank sentences in text[start:end]."""
+    end = len(text) if end is None else end
+    position = start
+    for match in SENTENCE_BOUNDARY.finditer(text, start, end):
+        if text[position:match.start()].strip():
+            yield position, match.start()
+        position = match.end()
+    if text[position:end].strip():
+        yield position, end
+
+def chunk_spans(text, tokenizer, max_tokens=250, overlap_tokens=32):
+    """
+    Split text into (start, end) spans that respect section and sentence boundaries.
+
+    Chunks never cross a section heading, are packed sentence by sentence up
+    to max_tokens tokens of the embedding model, and repeat up to
+    overlap_tokens tokens of trailing sentences from the previous chunk.
+    Sentences longer than max_tokens are cut at token boundaries.
+
+    Args:
+        text (str): Source text.
+        tokenizer: Fast Hugging Face tokenizer of the embedding model.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens shared with the previous chunk.
+
+    Yields:
+        tuple: (start, end) character offsets into text.
+    """
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    token_starts = [s for s, _ in offsets]
+
+    def pieces(start, end):
+        # Sentences over the budget are split into max_tokens-sized token runs
+        first, last = bisect_left(token_starts, start), bisect_left(token_starts, end)
+        if last - first <= max_tokens:
+            yield start, end, last - first
+            return
+        for i in range(first, last, max_tokens):
+            j = min(i + max_tokens, last)
+            yield offsets[i][0], offsets[j - 1][1], j - i
+
+    boundaries = [0] + [m.start() for m in SECTION_HEADING.finditer(text)] + [len(text)]
+    for section_start, section_end in zip(boundaries, boundaries[1:]):
+        current, current_tokens = [], 0
+        for sentence in sentence_spans(text, section_start, section_end):
+            for start, end, count in pieces(*sentence):
+                if current and current_tokens + count > max_tokens:
+                    yield current[0][0], current[-1][1]
+                    # Carry trailing sentences forward as overlap, if they leave room
+                    carry, carry_tokens = [], 0
+                    for piece in reversed(current):
+                        if carry_tokens + piece[2] > overlap_tokens:
+                            break
+                        carry.insert(0, piece)
+                        carry_tokens += piece[2]
+                    if carry_tokens + count > max_tokens:
+                        carry, carry_tokens = [], 0
+                    current, current_tokens = carry, carry_tokens
+                current.append((start, end, count))
+                current_tokens += count
+        if current:
+            yield current[0][0], current[-1][1]
+
+class TextSpans(Sequence):
+    """Read-only sequence of chunk strings backed by one source text and (start, end) spans."""
+
+    def __init__(self, text, spans):
+        self.text = text
+        self.spans = list(spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.text[start:end] for start, end in self.spans[index]]
+        start, end = self.spans[index]
+        return self.text[start:end]
+
+    def subset(self, indices):
+        """TextSpans over the chunks at the given indices, still sharing the source text."""
+        return TextSpans(self.text, [self.spans[i] for i in indices])
\ No newline at end of file